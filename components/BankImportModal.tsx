@@ -22,6 +22,14 @@ interface TempTransaction {
     type: 'INCOME' | 'EXPENSE';
 }
 
+interface ParseWarning {
+    line: number;
+    description: string;
+    expected_balance: number;
+    statement_balance: number;
+    message: string;
+}
+
 type Step = 'upload' | 'preview';
 type FilterType = 'ALL' | 'INCOME' | 'EXPENSE';
 
@@ -39,6 +47,7 @@ export const BankImportModal: React.FC<BankImportModalProps> = ({ isOpen, onClos
     const [selectedIds, setSelectedIds] = useState<Set<string>>(new Set());
     const [filter, setFilter] = useState<FilterType>('ALL');
     const [expandedId, setExpandedId] = useState<string | null>(null);
+    const [warnings, setWarnings] = useState<ParseWarning[]>([]);
 
     const handleFileChange = (e: React.ChangeEvent<HTMLInputElement>) => {
         if (e.target.files && e.target.files[0]) {
@@ -65,6 +74,10 @@ export const BankImportModal: React.FC<BankImportModalProps> = ({ isOpen, onClos
                 setTransactions(data.transactions);
                 setSelectedIds(new Set(data.transactions.map((t: TempTransaction) => t.id)));
                 setStep('preview');
+                setWarnings(data.warnings || []);
+                if (data.warnings?.length) {
+                    toast.warning('O saldo do extrato não confere: alguma transação pode não ter sido reconhecida.');
+                }
             } else {
                 toast.error(data.error || 'Erro ao processar arquivo.');
             }
@@ -206,6 +219,21 @@ export const BankImportModal: React.FC<BankImportModalProps> = ({ isOpen, onClos
 
     const renderPreviewStep = () => (
         <div className="flex flex-col h-[70vh]">
+            {/* Divergências de saldo (linhas do extrato possivelmente não reconhecidas) */}
+            {warnings.length > 0 && (
+                <div className="mb-3 p-3 rounded-lg border border-yellow-500/30 bg-yellow-500/10 text-xs text-yellow-200 space-y-1 max-h-28 overflow-y-auto">
+                    <div className="flex items-center gap-2 font-semibold">
+                        <Icon name="error" className="text-sm" />
+                        {warnings.length} divergência(s) de saldo no extrato
+                    </div>
+                    {warnings.map(w => (
+                        <p key={w.line}>
+                            {w.message} Esperado {formatCurrency(w.expected_balance)}, extrato {formatCurrency(w.statement_balance)}.
+                        </p>
+                    ))}
+                </div>
+            )}
+
             {/* Filtros e Controles */}
             <div className="flex items-center justify-between mb-4 flex-wrap gap-2 text-sm sticky top-0 bg-[#0f1216] z-10 py-2">
                 <div className="flex bg-white/[0.05] p-1 rounded-lg">
@@ -1,5 +1,10 @@
 from PIL import Image
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import argparse
+import hashlib
+import json
 import os
+import time
 
 # Caminho da imagem original
 source_image = "assets/icon.png"
@@ -8,6 +13,12 @@ adaptive_image = "assets/icon.png"  # Usar a mesma imagem por padrão se não ho
 # Base path para os recursos Android
 android_res = r"android/app/src/main/res"
 
+# Manifesto com o hash de cada saída gerada (para pular o que já está atualizado)
+manifest_path = "assets/icons-manifest.json"
+
+# Aumentar quando a forma de renderizar mudar, para invalidar o manifesto
+RENDER_VERSION = 2
+
 # Tamanhos para mipmap (ícones do launcher)
 mipmap_sizes = {
     "mipmap-mdpi": 48,
@@ -17,91 +28,185 @@ mipmap_sizes = {
     "mipmap-xxxhdpi": 192
 }
 
-def create_icon_with_background(logo_path, size, output_path):
+favicon_sizes = [16, 32, 192, 512]
+
+# Logo decodificada, uma por processo (preenchida por init_worker)
+_logos = {}
+
+
+def init_worker(logos):
+    """Recebe as logos já decodificadas (modo, tamanho, pixels) e monta as imagens uma vez por processo"""
+    for path, (mode, size, pixels) in logos.items():
+        _logos[path] = Image.frombytes(mode, size, pixels)
+
+
+def render_with_background(logo, size):
     """Cria um ícone com fundo branco e logo centralizada"""
     # Criar imagem de fundo branco
     icon = Image.new('RGB', (size, size), 'white')
-    
-    # Abrir logo
-    logo = Image.open(logo_path)
-    
-    # Converter para RGBA se necessário
-    if logo.mode != 'RGBA':
-        logo = logo.convert('RGBA')
-    
+
     # Redimensionar logo mantendo proporção (80% do tamanho do ícone)
+    logo = logo.copy()
     logo_size = int(size * 0.8)
     logo.thumbnail((logo_size, logo_size), Image.Resampling.LANCZOS)
-    
-    # Calcular posição para centralizar
+
+    # Colar logo no centro
     x = (size - logo.width) // 2
     y = (size - logo.height) // 2
-    
-    # Colar logo no centro
-    icon.paste(logo, (x, y), logo if logo.mode == 'RGBA' else None)
-    
-    # Salvar
-    icon.save(output_path, 'PNG')
-    print(f"✓ Criado: {output_path}")
+    icon.paste(logo, (x, y), logo)
+    return icon
+
 
-def create_adaptive_icon(logo_path, size, output_path):
+def render_adaptive(logo, size):
     """Cria foreground para adaptive icon (transparente)"""
-    # Abrir logo
-    logo = Image.open(logo_path)
-    
-    # Converter para RGBA
-    if logo.mode != 'RGBA':
-        logo = logo.convert('RGBA')
-    
-    # Criar imagem transparente
     icon = Image.new('RGBA', (size, size), (0, 0, 0, 0))
-    
+
     # Redimensionar logo (70% do tamanho para safe zone)
+    logo = logo.copy()
     logo_size = int(size * 0.7)
     logo.thumbnail((logo_size, logo_size), Image.Resampling.LANCZOS)
-    
+
     # Centralizar
     x = (size - logo.width) // 2
     y = (size - logo.height) // 2
-    
-    # Colar logo
     icon.paste(logo, (x, y), logo)
-    
-    # Salvar
-    icon.save(output_path, 'PNG')
-    print(f"✓ Criado: {output_path}")
-
-# Criar ícones regulares (mipmap)
-print("\n📱 Gerando ícones do launcher...")
-for folder, size in mipmap_sizes.items():
-    # ic_launcher.png
-    output_path = os.path.join(android_res, folder, "ic_launcher.png")
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    create_icon_with_background(source_image, size, output_path)
-    
-    # ic_launcher_round.png
-    output_path_round = os.path.join(android_res, folder, "ic_launcher_round.png")
-    create_icon_with_background(source_image, size, output_path_round)
-
-# Criar adaptive icons (foreground)
-print("\n🎨 Gerando adaptive icons...")
-for folder, size in mipmap_sizes.items():
-    output_path = os.path.join(android_res, folder, "ic_launcher_foreground.png")
-    create_adaptive_icon(adaptive_image, size, output_path)
-
-# Criar favicon para web
-print("\n🌐 Gerando favicon...")
-favicon_sizes = [16, 32, 192, 512]
-for size in favicon_sizes:
-    output_path = f"public/favicon-{size}x{size}.png"
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    create_icon_with_background(source_image, size, output_path)
-
-# Criar favicon.ico (16x16 e 32x32)
-print("\n📄 Gerando favicon.ico...")
-img16 = Image.open("public/favicon-16x16.png")
-img32 = Image.open("public/favicon-32x32.png")
-img16.save("public/favicon.ico", format='ICO', sizes=[(16, 16), (32, 32)])
-print("✓ Criado: public/favicon.ico")
-
-print("\n✅ Todos os ícones foram gerados com sucesso!")
+    return icon
+
+
+def run_job(job):
+    """Renderiza um job e grava todas as suas saídas. Roda dentro do pool."""
+    started = time.perf_counter()
+    logo = _logos[job["source"]]
+
+    if job["kind"] == "ico":
+        # favicon.ico com 16x16 e 32x32, cada tamanho renderizado a partir da logo.
+        # Salvar a partir da maior: o Pillow ignora tamanhos maiores que a imagem base
+        img16, img32 = (render_with_background(logo, s) for s in (16, 32))
+        for output_path in job["outputs"]:
+            img32.save(output_path, format='ICO', sizes=[(16, 16), (32, 32)], append_images=[img16])
+    else:
+        render = render_adaptive if job["kind"] == "adaptive" else render_with_background
+        icon = render(logo, job["size"])
+        for output_path in job["outputs"]:
+            icon.save(output_path, 'PNG')
+
+    return job, time.perf_counter() - started
+
+
+def build_jobs():
+    """Lista de jobs (um por renderização); ic_launcher e ic_launcher_round saem do mesmo job"""
+    jobs = []
+    for folder, size in mipmap_sizes.items():
+        jobs.append({
+            "label": "📱 launcher", "kind": "background", "source": source_image, "size": size,
+            "outputs": [os.path.join(android_res, folder, "ic_launcher.png"),
+                        os.path.join(android_res, folder, "ic_launcher_round.png")],
+        })
+    for folder, size in mipmap_sizes.items():
+        jobs.append({
+            "label": "🎨 adaptive", "kind": "adaptive", "source": adaptive_image, "size": size,
+            "outputs": [os.path.join(android_res, folder, "ic_launcher_foreground.png")],
+        })
+    for size in favicon_sizes:
+        jobs.append({
+            "label": "🌐 favicon", "kind": "background", "source": source_image, "size": size,
+            "outputs": [f"public/favicon-{size}x{size}.png"],
+        })
+    jobs.append({
+        "label": "📄 favicon.ico", "kind": "ico", "source": source_image, "size": 32,
+        "outputs": ["public/favicon.ico"],
+    })
+    return jobs
+
+
+def file_hash(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def job_key(job, source_hashes):
+    """Hash do que determina o conteúdo das saídas: imagem de origem + parâmetros do job"""
+    spec = {"version": RENDER_VERSION, "kind": job["kind"], "size": job["size"],
+            "source": source_hashes[job["source"]]}
+    return hashlib.sha256(json.dumps(spec, sort_keys=True).encode()).hexdigest()
+
+
+def is_up_to_date(job, key, manifest):
+    """Atualizado se a chave bate e cada saída ainda tem o conteúdo que foi gravado"""
+    for output_path in job["outputs"]:
+        entry = manifest.get(output_path)
+        if not entry or entry["key"] != key or not os.path.exists(output_path):
+            return False
+        if file_hash(output_path) != entry["sha256"]:
+            return False
+    return True
+
+
+def load_manifest():
+    if not os.path.exists(manifest_path):
+        return {}
+    with open(manifest_path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_manifest(manifest):
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def decode_sources(paths):
+    """Lê e decodifica cada imagem de origem uma única vez; retorna (pixels por caminho, hash por caminho)"""
+    logos, hashes = {}, {}
+    for path in paths:
+        hashes[path] = file_hash(path)
+        logo = Image.open(path)
+        if logo.mode != 'RGBA':
+            logo = logo.convert('RGBA')
+        logos[path] = (logo.mode, logo.size, logo.tobytes())
+    return logos, hashes
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Gera os ícones Android e os favicons a partir de assets/icon.png')
+    parser.add_argument('--force', action='store_true', help='Regenera tudo, ignorando o manifesto')
+    parser.add_argument('--jobs', type=int, default=None, help='Número de processos (padrão: CPUs)')
+    args = parser.parse_args()
+
+    total_started = time.perf_counter()
+    jobs = build_jobs()
+    logos, source_hashes = decode_sources({job["source"] for job in jobs})
+    manifest = {} if args.force else load_manifest()
+
+    pending = []
+    for job in jobs:
+        key = job_key(job, source_hashes)
+        if is_up_to_date(job, key, manifest):
+            for output_path in job["outputs"]:
+                print(f"• Atualizado: {output_path}")
+        else:
+            pending.append((job, key))
+
+    if pending:
+        print(f"\n⚙️  Gerando {len(pending)} de {len(jobs)} assets...")
+        for job, _ in pending:
+            for output_path in job["outputs"]:
+                os.makedirs(os.path.dirname(output_path), exist_ok=True)
+
+        with ProcessPoolExecutor(max_workers=args.jobs, initializer=init_worker, initargs=(logos,)) as pool:
+            futures = {pool.submit(run_job, job): key for job, key in pending}
+            for future in as_completed(futures):
+                job, elapsed = future.result()
+                key = futures[future]
+                for output_path in job["outputs"]:
+                    manifest[output_path] = {"key": key, "sha256": file_hash(output_path)}
+                    print(f"✓ Criado: {output_path} ({job['label']} {job['size']}px, {elapsed * 1000:.1f} ms)")
+
+        save_manifest(manifest)
+
+    total = time.perf_counter() - total_started
+    print(f"\n✅ Ícones prontos: {len(pending)} gerados, {len(jobs) - len(pending)} já atualizados ({total:.2f}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -23,6 +23,7 @@ const Budgets: React.FC = () => {
       .filter(t => {
         const tDate = getTransactionDate(t.date);
         return t.type === TransactionType.EXPENSE &&
+          !t.transferPairId &&
           t.category === budget.category &&
           tDate.getMonth() === currentDate.getMonth() &&
           tDate.getFullYear() === currentDate.getFullYear();
@@ -1,13 +1,17 @@
 import os
-import re
 import pandas as pd
 import PyPDF2
-from ofxparse import OfxParser
 from supabase import create_client, Client
 from dotenv import load_dotenv
 import datetime
 import io
-import time
+import re
+from recurring_charges import detect_recurring, normalizar_estabelecimento
+from ofx_stream import iter_ofx_transactions
+from transaction_batch import TransactionBatch, cents_to_decimal
+from extrato_scanner import escanear_extrato
+import notas_fiscais
+import transferencias
 
 load_dotenv()
 
@@ -32,97 +36,82 @@ class BankImportService:
         }
         for categoria, palavras_chave in categorias.items():
             for palavra in palavras_chave:
-                if palavra in descricao:
+                if categoria == "Transferência":
+                    # Whole words only: "DOCERIA" or "HOTEL LIMITED" are not transfers
+                    if re.search(rf'\b{palavra}\b', descricao):
+                        return categoria
+                elif palavra in descricao:
                     return categoria
         return "Outros"
 
     def parse_pdf(self, file_bytes):
-        """Extracts transactions from PDF using the logic provided by the user."""
+        """Extracts transactions from PDF using the logic provided by the user.
+
+        Returns (transactions, warnings): one warning per balance mismatch, i.e.
+        a statement line that was probably not recognized.
+        """
         texto = ""
         pdf_reader = PyPDF2.PdfReader(io.BytesIO(file_bytes))
         for page in pdf_reader.pages:
             texto += page.extract_text() + "\n"
 
-        linhas = texto.split('\n')
-        transacoes = []
-        data_atual = None
-        regex_data = re.compile(r'(\d+)\s+de\s+(\w+)\s+de\s+(\d{4})')
-        meses = {
-            "Janeiro": "01", "Fevereiro": "02", "Março": "03", "Abril": "04",
-            "Maio": "05", "Junho": "06", "Julho": "07", "Agosto": "08",
-            "Setembro": "09", "Outubro": "10", "Novembro": "11", "Dezembro": "12"
-        }
-
-        for linha in linhas:
-            linha = linha.strip()
-            if not linha: continue
-
-            match_data = regex_data.search(linha)
-            if match_data:
-                dia, mes_nome, ano = match_data.groups()
-                mes = meses.get(mes_nome.capitalize(), "01")
-                data_atual = f"{ano}-{mes}-{dia.zfill(2)}"
-                continue
-
-            # Standard format: Description R$ Amount R$ Balance
-            regex_transacao = re.compile(r'(.+?)\s+(-?R\$\s*[\d.,]+)\s+(R\$\s*[\d.,]+)$')
-            match_trans = regex_transacao.search(linha)
+        transacoes = TransactionBatch()
+        linhas, divergencias = escanear_extrato(texto)
+        for data, descricao, valor_cents in linhas:
+            transacoes.append_cents(data, valor_cents, descricao)
 
-            if match_trans and data_atual:
-                descricao_bruta = match_trans.group(1).strip()
-                valor_str = match_trans.group(2).replace('R$', '').replace('.', '').replace(',', '.').replace(' ', '').strip()
-                
-                try:
-                    valor = float(valor_str)
-                    transacoes.append({
-                        "date": data_atual,
-                        "description": descricao_bruta,
-                        "amount": valor,
-                    })
-                except ValueError:
-                    continue
-        return transacoes
+        warnings = []
+        for d in divergencias:
+            print(f"Warning: balance mismatch at line {d['linha']} ({d['descricao']}): "
+                  f"expected {d['saldo_esperado'] / 100:.2f}, statement says {d['saldo_extrato'] / 100:.2f}")
+            warnings.append({
+                "line": d["linha"],
+                "description": d["descricao"],
+                "expected_balance": float(cents_to_decimal(d["saldo_esperado"])),
+                "statement_balance": float(cents_to_decimal(d["saldo_extrato"])),
+                "message": f"Saldo divergente na linha {d['linha']} ({d['descricao']}): "
+                           f"alguma transação anterior pode não ter sido reconhecida.",
+            })
+        return transacoes, warnings
 
     def parse_ofx(self, file_bytes):
-        ofx = OfxParser.parse(io.BytesIO(file_bytes))
-        transactions = []
-        for account in ofx.accounts:
-            for tx in account.statement.transactions:
-                transactions.append({
-                    "date": tx.date.strftime("%Y-%m-%d"),
-                    "amount": float(tx.amount),
-                    "description": tx.memo or tx.payee or "Transação s/ desc."
-                })
+        transactions = TransactionBatch()
+        for tx in iter_ofx_transactions(io.BytesIO(file_bytes)):
+            transactions.append(tx["date"], tx["amount"], tx["description"], tx["fitid"])
         return transactions
 
     def parse_xlsx(self, file_bytes):
         df = pd.read_excel(io.BytesIO(file_bytes))
         # Expected columns: Data, Descrição, Valor
         # We try to be flexible
-        transactions = []
+        transactions = TransactionBatch()
         for _, row in df.iterrows():
             try:
                 date_val = str(row.get('Data', row.get('date', '')))
-                # Basic parsing if date is string dd/mm/yyyy
+                # Basic parsing if date is string dd/mm/yyyy (day and month may be unpadded: 1/2/2026)
                 if '/' in date_val:
-                    d, m, y = date_val.split('/')
-                    date_val = f"{y}-{m}-{d}"
+                    date_val = datetime.datetime.strptime(date_val.split()[0], "%d/%m/%Y").date()
                 
-                transactions.append({
-                    "date": date_val,
-                    "amount": float(row.get('Valor', row.get('amount', 0))),
-                    "description": str(row.get('Descrição', row.get('description', 'Transação')))
-                })
-            except:
+                transactions.append(
+                    date_val,
+                    row.get('Valor', row.get('amount', 0)),
+                    str(row.get('Descrição', row.get('description', 'Transação')))
+                )
+            except Exception as e:
+                print(f"Skipping spreadsheet row {row.name}: {e}")
                 continue
         return transactions
 
     def parse_file(self, file_bytes, filename):
-        """Determines format and extracts transactions without saving."""
+        """Determines format and extracts transactions without saving.
+
+        Returns (transactions, warnings); only PDF statements produce warnings.
+        """
         ext = os.path.splitext(filename)[1].lower()
         
+        warnings = []
         if ext == '.pdf':
-            data = self.parse_pdf(file_bytes)
+            data, warnings = self.parse_pdf(file_bytes)
         elif ext == '.ofx':
             data = self.parse_ofx(file_bytes)
         elif ext in ['.xlsx', '.xls']:
@@ -130,39 +119,330 @@ class BankImportService:
         else:
             raise Exception(f"Formato {ext} não suportado.")
 
-        # Enrich with suggested categories and IDs for frontend selection
-        for i, tx in enumerate(data):
-            tx['id'] = f"tmp_{i}_{int(time.time())}"
-            tx['category'] = self.categorizar_transacao(tx['description'])
-            tx['type'] = "INCOME" if tx['amount'] > 0 else "EXPENSE"
-            
-        return data
+        # Suggested categories; ids for frontend selection are added by to_dicts()
+        return data.categorize(self.categorizar_transacao), warnings
 
     def save_transactions(self, transactions, user_id, account_id):
-        """Saves a list of pre-parsed transactions to Supabase."""
+        """Saves pre-parsed transactions (a TransactionBatch or JSON rows) to Supabase."""
+        if not isinstance(transactions, TransactionBatch):
+            transactions = TransactionBatch.from_dicts(transactions)
+
         count = 0
-        for tx in transactions:
+        merchants = {}
+        inserted = []
+        known_fitids = self.existing_fitids(user_id, account_id, transactions.fitids)
+        for date, tx_type, amount, description, category, fitid in transactions.rows():
+            if fitid:
+                if fitid in known_fitids:
+                    continue
+                known_fitids.add(fitid)
+
             payload = {
                 "user_id": user_id,
                 "account_id": account_id if account_id else None,
-                "description": tx['description'],
-                "amount": abs(tx['amount']),
-                "type": tx['type'],
-                "date": tx['date'],
+                "description": description,
+                "amount": str(amount),
+                "type": tx_type,
+                "date": date,
                 "is_paid": True,
-                "category": tx['category']
+                "category": category,
+                "fitid": fitid
             }
-            
+
             try:
                 self.supabase.table("transactions").insert(payload).execute()
                 count += 1
+                inserted.append(payload)
+                merchant = normalizar_estabelecimento(description) if tx_type == "EXPENSE" else ""
+                # Empty keys (only digits or a bank prefix) are never detected; don't re-evaluate them
+                if merchant:
+                    merchants.setdefault(merchant, description)
             except Exception as e:
                 print(f"Error inserting: {e}")
-        
+
+        if inserted and account_id:
+            try:
+                dates = sorted(p["date"] for p in inserted)
+                self.link_transfers(user_id, dates[0], dates[-1])
+            except Exception as e:
+                print(f"Error pairing transfers: {e}")
+
+        if merchants:
+            try:
+                self.refresh_recurring_charges(user_id, merchants)
+            except Exception as e:
+                print(f"Error detecting recurring charges: {e}")
+
         return count
 
+    def link_transfers(self, user_id, start_date, end_date, window_days=2):
+        """Pairs transfers between the user's own accounts around [start_date, end_date].
+
+        Both rows of a pair get transfer_pair_id pointing at each other; the
+        monthly_aggregates triggers then take them out of the totals, so the
+        money moved between two of the user's accounts isn't counted as an
+        expense plus an income.
+        """
+        start = (datetime.date.fromisoformat(start_date) - datetime.timedelta(days=window_days)).isoformat()
+        end = (datetime.date.fromisoformat(end_date) + datetime.timedelta(days=window_days)).isoformat()
+        columns = "id, account_id, date, amount, type, category, description, transfer_pair_id"
+        rows = {}
+        for page in self.iter_user_transactions(user_id, columns, start_date=start, end_date=end):
+            for tx in page:
+                if tx.get("transfer_pair_id") is None and transferencias.eh_transferencia(tx):
+                    rows[tx["id"]] = tx
+
+        pairs = transferencias.pair_transfers(rows.values(), window_days)
+        if not pairs:
+            return 0
+        # Both sides of every pair in one statement: no half-linked pair on failure
+        response = self.supabase.rpc("link_transfer_pairs", {
+            "p_user_id": user_id,
+            "p_pairs": [{"out_id": out_id, "in_id": in_id} for out_id, in_id in pairs],
+        }).execute()
+        return response.data or 0
+
+    def existing_fitids(self, user_id, account_id, fitids, batch_size=200):
+        """Returns which of the given OFX FITIDs were already imported into the account."""
+        fitids = list({f for f in fitids if f})
+        found = set()
+        for i in range(0, len(fitids), batch_size):
+            query = (
+                self.supabase.table("transactions")
+                .select("fitid")
+                .eq("user_id", user_id)
+                .in_("fitid", fitids[i:i + batch_size])
+            )
+            query = query.eq("account_id", account_id) if account_id else query.is_("account_id", "null")
+            found.update(row["fitid"] for row in query.execute().data or [])
+        return found
+
+    def iter_user_transactions(self, user_id, columns="date, amount, description, type", start_date=None, end_date=None,
+                               page_size=1000, expenses_only=False, description_tokens=None):
+        """Yields a user's transactions page by page, past the PostgREST row limit.
+
+        `description_tokens` keeps only rows whose description contains one of
+        the tokens (case-insensitive).
+        """
+        start = 0
+        while True:
+            query = (
+                self.supabase.table("transactions")
+                .select(columns)
+                .eq("user_id", user_id)
+            )
+            if start_date:
+                query = query.gte("date", start_date)
+            if end_date:
+                query = query.lte("date", end_date)
+            if expenses_only:
+                query = query.in_("type", ["EXPENSE", "expense"])
+            if description_tokens:
+                query = query.or_(",".join(f"description.ilike.*{token}*" for token in description_tokens))
+            response = query.order("date").order("id").range(start, start + page_size - 1).execute()
+            page = response.data or []
+            if page:
+                yield page
+            if len(page) < page_size:
+                return
+            start += page_size
+
+    def fetch_user_transactions(self, user_id, columns="date, amount, description, type", **filters):
+        """Fetches the transactions of a user into a single list (filters as in iter_user_transactions)."""
+        rows = []
+        for page in self.iter_user_transactions(user_id, columns, **filters):
+            rows.extend(page)
+        return rows
+
+    def fetch_merchant_history(self, user_id, merchants, batch_size=20):
+        """Fetches the expenses that may belong to the given merchants.
+
+        `merchants` maps a merchant key (normalizar_estabelecimento) to one raw
+        description of it. The database is searched by one word of the key
+        that appears as-is in that description (keys have accents stripped);
+        detect_recurring then drops the rows whose key doesn't match. Returns
+        None when some merchant has no usable word, so the caller falls back
+        to the full history.
+        """
+        tokens = set()
+        for merchant, description in merchants.items():
+            raw = str(description or "").upper()
+            token = next((t for t in sorted(merchant.split(), key=len, reverse=True) if len(t) >= 3 and t in raw), None)
+            if token is None:
+                return None
+            tokens.add(token)
+
+        rows = {}
+        tokens = sorted(tokens)
+        for i in range(0, len(tokens), batch_size):
+            for tx in self.fetch_user_transactions(user_id, "id, date, amount, description, type",
+                                                   expenses_only=True, description_tokens=tokens[i:i + batch_size]):
+                rows[tx["id"]] = tx
+        return list(rows.values())
+
+    def detect_recurring_charges(self, user_id, merchants=None):
+        """Runs the recurring charge detector.
+
+        With `merchants` ({merchant key: sample description}) only those series
+        are evaluated, over just their expenses; otherwise over the full history.
+        """
+        history = self.fetch_merchant_history(user_id, merchants) if merchants else None
+        if history is None:
+            history = self.fetch_user_transactions(user_id, expenses_only=True)
+        return detect_recurring(history, merchants=merchants)
+
+    def refresh_recurring_charges(self, user_id, merchants=None):
+        """Re-detects recurring charges and syncs them into recurring_charges.
+
+        When `merchants` is given (the merchants touched by an import), only
+        those series are re-evaluated; otherwise all of the user's. Evaluated
+        merchants that no longer qualify (e.g. a cancelled subscription) are
+        deleted.
+        """
+        charges = self.detect_recurring_charges(user_id, merchants)
+        detected = [charge["merchant"] for charge in charges]
+        if charges:
+            now = datetime.datetime.now().isoformat()
+            payload = [{**charge, "user_id": user_id, "updated_at": now} for charge in charges]
+            self.supabase.table("recurring_charges").upsert(payload, on_conflict="user_id,merchant").execute()
+
+        table = self.supabase.table("recurring_charges")
+        if merchants is None:
+            query = table.delete().eq("user_id", user_id)
+            if detected:
+                query = query.not_.in_("merchant", detected)
+            query.execute()
+        else:
+            stale = sorted(set(merchants) - set(detected))
+            for i in range(0, len(stale), 200):
+                table.delete().eq("user_id", user_id).in_("merchant", stale[i:i + 200]).execute()
+        return charges
+
+    def list_recurring_charges(self, user_id):
+        """Reads the stored recurring charges of a user, largest first."""
+        response = (
+            self.supabase.table("recurring_charges")
+            .select("merchant, cadence, interval_days, average_amount, last_amount, occurrences, "
+                    "first_date, last_date, next_expected_date, updated_at")
+            .eq("user_id", user_id)
+            .order("average_amount", desc=True)
+            .execute()
+        )
+        return response.data or []
+
+    def import_fiscal_notes(self, file_bytes, filename, user_id, account_id, chunk_size=500):
+        """Imports NF-e/NFC-e XML (or a ZIP of them) into fiscal_notes and fiscal_note_items.
+
+        Notes are streamed and handled `chunk_size` at a time. Each note is linked
+        to an existing expense with the same total a few days around its issue
+        date; notes without a match create a new expense transaction.
+        """
+        totals = {"notes": 0, "matched": 0, "created": 0, "items": 0, "skipped": 0}
+        chunk = []
+        for note in notas_fiscais.iter_nfe_file(file_bytes, filename):
+            chunk.append(note)
+            if len(chunk) >= chunk_size:
+                self._save_fiscal_notes(chunk, user_id, account_id, totals)
+                chunk = []
+        if chunk:
+            self._save_fiscal_notes(chunk, user_id, account_id, totals)
+        return totals
+
+    def _save_fiscal_notes(self, notes, user_id, account_id, totals, window_days=3):
+        # 1. Skip notes imported before (and duplicates inside the file)
+        keys = list({n["access_key"] for n in notes})
+        known = set()
+        for i in range(0, len(keys), 200):
+            response = (
+                self.supabase.table("fiscal_notes")
+                .select("access_key")
+                .eq("user_id", user_id)
+                .in_("access_key", keys[i:i + 200])
+                .execute()
+            )
+            known.update(row["access_key"] for row in response.data or [])
+        fresh = []
+        for note in notes:
+            if note["access_key"] in known:
+                totals["skipped"] += 1
+                continue
+            known.add(note["access_key"])
+            fresh.append(note)
+        if not fresh:
+            return
+
+        # 2. Candidate expenses around the notes' dates that no note points to yet
+        days = sorted(n["issued_at"] for n in fresh)
+        start = (datetime.date.fromisoformat(days[0]) - datetime.timedelta(days=window_days)).isoformat()
+        end = (datetime.date.fromisoformat(days[-1]) + datetime.timedelta(days=window_days)).isoformat()
+        candidates = []
+        for page in self.iter_user_transactions(user_id, "id, date, amount, type", start_date=start, end_date=end):
+            candidates.extend(tx for tx in page if tx["type"] == "EXPENSE")
+        linked = set()
+        ids = [tx["id"] for tx in candidates]
+        for i in range(0, len(ids), 200):
+            response = self.supabase.table("fiscal_notes").select("transaction_id").in_("transaction_id", ids[i:i + 200]).execute()
+            linked.update(row["transaction_id"] for row in response.data or [])
+        matches = notas_fiscais.match_notes(fresh, [tx for tx in candidates if tx["id"] not in linked], window_days)
+
+        # 3. One bulk insert for the expenses of unmatched notes
+        unmatched = [n for n in fresh if n["access_key"] not in matches]
+        if unmatched:
+            payloads = [{
+                "user_id": user_id,
+                "account_id": account_id if account_id else None,
+                "description": f"NF {n.get('issuer_name') or n['access_key']}",
+                "amount": str(cents_to_decimal(n["total_cents"])),
+                "type": "EXPENSE",
+                "date": n["issued_at"],
+                "is_paid": True,
+                "category": self.categorizar_transacao(n.get("issuer_name") or ""),
+            } for n in unmatched]
+            response = self.supabase.table("transactions").insert(payloads).execute()
+            for note, row in zip(unmatched, response.data):
+                matches[note["access_key"]] = row["id"]
+
+        # 4. Notes, then their items, in bulk
+        response = self.supabase.table("fiscal_notes").insert([{
+            "user_id": user_id,
+            "transaction_id": matches[n["access_key"]],
+            "access_key": n["access_key"],
+            "model": n.get("model"),
+            "status": "imported",
+            "nfe_number": n.get("number"),
+            "nfe_series": n.get("series"),
+            "issuer_cnpj": n.get("issuer_cnpj"),
+            "issuer_name": n.get("issuer_name"),
+            "issued_at": n["issued_at"],
+            "total_amount": str(cents_to_decimal(n["total_cents"])),
+        } for n in fresh]).execute()
+        note_ids = {row["access_key"]: row["id"] for row in response.data}
+
+        items = [{
+            "fiscal_note_id": note_ids[n["access_key"]],
+            "user_id": user_id,
+            "item_number": item["item_number"],
+            "code": item["code"],
+            "ean": item["ean"],
+            "ncm": item["ncm"],
+            "description": item["description"],
+            "quantity": item["quantity"],
+            "unit": item["unit"],
+            "unit_price": item["unit_price"],
+            "total": str(cents_to_decimal(item["total_cents"])),
+        } for n in fresh for item in n["items"]]
+        for i in range(0, len(items), 1000):
+            self.supabase.table("fiscal_note_items").insert(items[i:i + 1000]).execute()
+
+        totals["notes"] += len(fresh)
+        totals["matched"] += len(fresh) - len(unmatched)
+        totals["created"] += len(unmatched)
+        totals["items"] += len(items)
+
     def process_and_save(self, file_bytes, filename, user_id, account_id):
         # Legacy method or for direct import if needed
-        data = self.parse_file(file_bytes, filename)
+        if os.path.splitext(filename)[1].lower() in ('.xml', '.zip'):
+            return self.import_fiscal_notes(file_bytes, filename, user_id, account_id)["notes"]
+        data, _ = self.parse_file(file_bytes, filename)
         if not data: return 0
         return self.save_transactions(data, user_id, account_id)
@@ -0,0 +1,190 @@
+import csv
+import io
+from itertools import islice
+
+CHUNK_SIZE = 5000
+
+
+def iter_chunks(rows, chunk_size=CHUNK_SIZE):
+    """Splits any iterable of dicts into lists of at most `chunk_size` rows."""
+    iterator = iter(rows)
+    while True:
+        chunk = list(islice(iterator, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def dataframe_chunks(df, chunk_size=CHUNK_SIZE):
+    """Yields a DataFrame as lists of dicts without materializing all records at once."""
+    for start in range(0, len(df), chunk_size):
+        chunk = df.iloc[start:start + chunk_size].astype(object)
+        # NaN -> None so missing values don't turn text columns into floats
+        yield chunk.where(chunk.notna(), None).to_dict("records")
+
+
+def iter_csv(chunks, columns, bom=False):
+    """Yields CSV text, one block per chunk (suitable for a streamed HTTP response)."""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=columns, extrasaction="ignore")
+    if bom:
+        buffer.write("\ufeff")
+    writer.writeheader()
+    for chunk in chunks:
+        writer.writerows(chunk)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def write_csv(chunks, columns, path):
+    """Writes the chunks to a CSV file (utf-8 with BOM so Excel opens it correctly)."""
+    count = 0
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=columns, extrasaction="ignore")
+        f.write("\ufeff")
+        writer.writeheader()
+        for chunk in chunks:
+            writer.writerows(chunk)
+            count += len(chunk)
+    return count
+
+
+class _StreamSink:
+    """Minimal file-like object that collects what pyarrow writes so it can be yielded."""
+
+    def __init__(self):
+        self.parts = []
+        self.closed = False
+        self.position = 0
+
+    def write(self, data):
+        self.parts.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data = b"".join(self.parts)
+        self.parts = []
+        return data
+
+
+def _parquet_modules():
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise Exception("Exportação Parquet requer o pacote 'pyarrow'.")
+    return pa, pq
+
+
+def _arrow_type(pa, name):
+    """Type names usable in `types` (so callers don't need to import pyarrow)."""
+    factories = {
+        "string": pa.string,
+        "float64": pa.float64,
+        "int64": pa.int64,
+        "bool": pa.bool_,
+        "decimal": lambda: pa.decimal128(38, 2),
+    }
+    return factories[name]()
+
+
+def _parquet_schema(pa, columns, types=None, chunk=None):
+    """Builds the file schema.
+
+    Columns listed in `types` ({column: "string" | "float64" | "int64" |
+    "bool" | "decimal"}) get that type, which is the only safe choice when the
+    rows arrive page by page. Other columns are inferred from the first chunk,
+    widened so later chunks still fit: all null (or no chunk at all) becomes
+    string, integer becomes float (JSON amounts like 10 and 10.5 share one
+    column) and decimal gets the maximum precision, keeping its scale.
+    """
+    types = types or {}
+    inferred = pa.Table.from_pylist(chunk).schema if chunk else pa.schema([])
+    fields = []
+    for name in columns:
+        if name in types:
+            fields.append(pa.field(name, _arrow_type(pa, types[name])))
+            continue
+        idx = inferred.get_field_index(name)
+        field_type = inferred.field(idx).type if idx >= 0 else pa.null()
+        if pa.types.is_null(field_type):
+            field_type = pa.string()
+        elif pa.types.is_integer(field_type):
+            field_type = pa.float64()
+        elif pa.types.is_decimal(field_type):
+            field_type = pa.decimal128(38, max(field_type.scale, 2))
+        fields.append(pa.field(name, field_type))
+    return pa.schema(fields)
+
+
+def _write_parquet_chunks(pa, pq, sink, chunks, columns, types):
+    """Writes one row group per chunk; yields the row count of each chunk.
+
+    With no rows at all the file still gets its schema and footer, so an
+    empty export is a valid (empty) Parquet file.
+    """
+    writer = None
+    schema = None
+    try:
+        for chunk in chunks:
+            if writer is None:
+                schema = _parquet_schema(pa, columns, types, chunk)
+                writer = pq.ParquetWriter(sink, schema)
+            writer.write_table(pa.Table.from_pylist(chunk, schema=schema))
+            yield len(chunk)
+        if writer is None:
+            writer = pq.ParquetWriter(sink, _parquet_schema(pa, columns, types))
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+def iter_parquet(chunks, columns, types=None):
+    """Yields Parquet bytes incrementally: one row group per chunk."""
+    pa, pq = _parquet_modules()
+    sink = _StreamSink()
+    for _ in _write_parquet_chunks(pa, pq, sink, chunks, columns, types):
+        yield sink.drain()
+    yield sink.drain()
+
+
+def write_parquet(chunks, columns, path, types=None):
+    """Writes the chunks to a Parquet file, one row group per chunk."""
+    pa, pq = _parquet_modules()
+    return sum(_write_parquet_chunks(pa, pq, path, chunks, columns, types))
+
+
+def write_xlsx(chunks, columns, path):
+    """Writes the chunks to XLSX with openpyxl's write-only mode (opt-in, slowest format)."""
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet()
+    ws.append(columns)
+    count = 0
+    for chunk in chunks:
+        for row in chunk:
+            ws.append([row.get(c) for c in columns])
+        count += len(chunk)
+    wb.save(path)
+    return count
+
+
+WRITERS = {
+    "csv": write_csv,
+    "parquet": write_parquet,
+    "xlsx": write_xlsx,
+}
@@ -0,0 +1,94 @@
+import datetime
+import re
+
+LINHA_DATA = "data"
+LINHA_TRANSACAO = "transacao"
+LINHA_RUIDO = "ruido"
+
+MESES = {
+    "janeiro": 1, "fevereiro": 2, "março": 3, "marco": 3, "abril": 4,
+    "maio": 5, "junho": 6, "julho": 7, "agosto": 8,
+    "setembro": 9, "outubro": 10, "novembro": 11, "dezembro": 12
+}
+
+# One pattern, one match per line. A transaction line ends with
+# "<descrição> <valor> <saldo>", e.g. 'Pix enviado: "..." -R$ 636,66 -R$ 181,91'
+# (the greedy description backtracks from the end, so the two last amounts
+# are taken); any other line with "1 de Janeiro de 2026" is a date header.
+_VALOR = r'(-?)R\$\s*(\d{1,3}(?:\.\d{3})*|\d+)(?:,(\d{1,2}))?'
+REGEX_LINHA = re.compile(
+    r'(?:(.*\S)\s+' + _VALOR + r'\s+' + _VALOR + r'\s*$)'
+    r'|(?:.*?(\d{1,2})\s+de\s+([^\W\d_]+)\s+de\s+(\d{4}))'
+)
+
+
+def _cents(sinal, inteiro, fracao):
+    cents = int(inteiro.replace('.', '')) * 100
+    if fracao:
+        cents += int(fracao) * 10 if len(fracao) == 1 else int(fracao)
+    return -cents if sinal else cents
+
+
+def _interpretar(match):
+    # groups: descricao, (sinal, inteiro, fracao) x2, dia, mes, ano
+    g = match.groups()
+    if g[0] is not None:
+        return LINHA_TRANSACAO, (g[0], _cents(g[1], g[2], g[3]), _cents(g[4], g[5], g[6]))
+
+    mes = MESES.get(g[8].lower())
+    if mes is None:
+        return LINHA_RUIDO, None
+    try:
+        return LINHA_DATA, datetime.date(int(g[9]), mes, int(g[7]))
+    except ValueError:
+        return LINHA_RUIDO, None
+
+
+def classificar_linha(linha):
+    """Classifies a statement line in a single regex match.
+
+    Returns (LINHA_DATA, date), (LINHA_TRANSACAO, (descricao, valor_cents, saldo_cents))
+    or (LINHA_RUIDO, None).
+    """
+    match = REGEX_LINHA.match(linha.strip())
+    if match is None:
+        return LINHA_RUIDO, None
+    return _interpretar(match)
+
+
+def escanear_extrato(texto):
+    """Scans the text of a statement PDF.
+
+    Returns (transacoes, divergencias): transacoes is a list of
+    (data, descricao, valor_cents) and divergencias lists the transactions
+    whose balance column doesn't match the previous balance plus the amount,
+    which means a line in between was not recognized (or the PDF text is
+    out of order).
+    """
+    transacoes = []
+    divergencias = []
+    data_atual = None
+    saldo_anterior = None
+
+    match_linha = REGEX_LINHA.match
+    for numero, linha in enumerate(texto.split('\n'), 1):
+        match = match_linha(linha.strip())
+        if match is None:
+            continue
+
+        tipo, dados = _interpretar(match)
+        if tipo == LINHA_DATA:
+            data_atual = dados
+        elif tipo == LINHA_TRANSACAO and data_atual:
+            descricao, valor, saldo = dados
+            if saldo_anterior is not None and saldo_anterior + valor != saldo:
+                divergencias.append({
+                    "linha": numero,
+                    "descricao": descricao,
+                    "saldo_esperado": saldo_anterior + valor,
+                    "saldo_extrato": saldo,
+                })
+            saldo_anterior = saldo
+            transacoes.append((data_atual, descricao, valor))
+
+    return transacoes, divergencias
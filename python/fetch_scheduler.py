@@ -0,0 +1,146 @@
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class CircuitOpenError(Exception):
+    """Raised without calling the provider while the circuit breaker is open."""
+
+
+class AdaptiveLimiter:
+    """AIMD concurrency limit: +1 per window of successes, halved on failure."""
+
+    def __init__(self, initial=4, minimum=1, maximum=16):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.in_flight = 0
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        with self._cond:
+            while self.in_flight >= int(self.limit):
+                self._cond.wait()
+            self.in_flight += 1
+
+    def release(self, success):
+        with self._cond:
+            self.in_flight -= 1
+            if success:
+                self.limit = min(self.maximum, self.limit + 1.0 / self.limit)
+            else:
+                self.limit = max(self.minimum, self.limit / 2)
+            self._cond.notify_all()
+
+
+class CircuitBreaker:
+    """Opens after `threshold` consecutive failures; after `cooldown` seconds one probe is let through."""
+
+    def __init__(self, threshold=5, cooldown=30.0):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            if self.opened_at is None:
+                return "closed"
+            if time.monotonic() - self.opened_at >= self.cooldown:
+                return "half_open"
+            return "open"
+
+    def allow(self):
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at < self.cooldown or self._probing:
+                return False
+            self._probing = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._probing or self.failures >= self.threshold:
+                self.opened_at = time.monotonic()
+            self._probing = False
+
+
+class FetchScheduler:
+    """Runs many provider calls in parallel without hammering the provider.
+
+    Concurrency adapts to errors (AdaptiveLimiter), failed calls are retried
+    with exponential backoff and full jitter, and a CircuitBreaker stops all
+    calls for a while when the provider keeps failing (e.g. yfinance throttling).
+    Exceptions listed in `no_retry` (like QuoteNotFound) are final answers,
+    not provider failures.
+    """
+
+    def __init__(self, max_concurrency=8, initial_concurrency=4, retries=3,
+                 base_delay=0.5, max_delay=8.0, breaker=None, no_retry=()):
+        self.limiter = AdaptiveLimiter(initial_concurrency, 1, max_concurrency)
+        self.breaker = breaker or CircuitBreaker()
+        self.max_concurrency = max_concurrency
+        self.retries = retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.no_retry = tuple(no_retry)
+
+    def _backoff(self, attempt):
+        time.sleep(random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt))))
+
+    def call(self, fn, *args):
+        """Calls fn(*args) under the limiter, retrying transient errors."""
+        attempt = 0
+        while True:
+            if not self.breaker.allow():
+                raise CircuitOpenError("Provider circuit is open, skipping call")
+
+            self.limiter.acquire()
+            try:
+                result = fn(*args)
+            except self.no_retry:
+                self.limiter.release(True)
+                self.breaker.record_success()
+                raise
+            except Exception:
+                self.limiter.release(False)
+                self.breaker.record_failure()
+                if attempt >= self.retries:
+                    raise
+                self._backoff(attempt)
+                attempt += 1
+                continue
+
+            self.limiter.release(True)
+            self.breaker.record_success()
+            return result
+
+    def map(self, fn, keys):
+        """Runs fn(key) for each distinct key; returns {key: result or exception}."""
+        keys = list(dict.fromkeys(keys))
+        results = {}
+        if not keys:
+            return results
+
+        def run(key):
+            try:
+                return key, self.call(fn, key)
+            except Exception as e:
+                return key, e
+
+        with ThreadPoolExecutor(max_workers=min(self.max_concurrency, len(keys))) as pool:
+            for key, result in pool.map(run, keys):
+                results[key] = result
+        return results
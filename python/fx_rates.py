@@ -0,0 +1,50 @@
+import numpy as np
+from quote_providers import QuoteNotFound
+
+BASE_CURRENCY = "BRL"
+# FX pairs move slower than the quotes we refresh; keep them for an hour
+FX_TTL = 3600.0
+
+
+def fx_ticker(currency):
+    """Yahoo Finance symbol of the currency -> BRL rate, e.g. 'USD' -> 'USDBRL=X'."""
+    return f"{currency}{BASE_CURRENCY}=X"
+
+
+def fetch_rates(currencies, provider, scheduler):
+    """Fetches each distinct currency -> BRL rate once; returns {currency: rate or None}.
+
+    `provider` is normally a CachedQuoteProvider with FX_TTL, so later shards
+    and runs of the same process inside the TTL don't hit the network (the
+    cache is per process: each `--workers` process fetches the pair once).
+    """
+    rates = {BASE_CURRENCY: 1.0}
+    needed = sorted({c for c in currencies if c and c != BASE_CURRENCY})
+    if not needed:
+        return rates
+
+    for currency, quote in scheduler.map(lambda c: provider.get_quote(fx_ticker(c)), needed).items():
+        if isinstance(quote, Exception):
+            if not isinstance(quote, QuoteNotFound):
+                print(f"  Error fetching FX rate {fx_ticker(currency)}: {quote}")
+            rates[currency] = None
+        else:
+            rates[currency] = float(quote["price"])
+    return rates
+
+
+def convert(prices, quantities, currencies, rates):
+    """Converts all holdings in one vectorized step.
+
+    Returns (native_amounts, fx_rates, brl_amounts) as NumPy arrays; holdings
+    whose rate is unknown get NaN in fx_rates and brl_amounts.
+    """
+    prices = np.asarray(prices, dtype=np.float64)
+    quantities = np.asarray(quantities, dtype=np.float64)
+    codes, inverse = np.unique(np.asarray([c or BASE_CURRENCY for c in currencies], dtype=object), return_inverse=True)
+    rate_table = np.array([np.nan if rates.get(c) is None else rates[c] for c in codes], dtype=np.float64)
+
+    native = np.round(prices * quantities, 2)
+    fx = rate_table[inverse]
+    brl = np.round(native * fx, 2)
+    return native, fx, brl
@@ -2,7 +2,8 @@ import argparse
 import os
 import pandas as pd
 import pdfplumber
-from ofxparse import OfxParser
+from ofx_stream import iter_ofx_transactions
+from transaction_batch import TransactionBatch
 from supabase import create_client, Client
 from dotenv import load_dotenv
 import datetime
@@ -25,24 +26,14 @@ supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
 
 def parse_ofx(file_path):
     print(f"Parsing OFX: {file_path}")
-    with open(file_path, encoding="latin-1") as fileobj:
-        ofx = OfxParser.parse(fileobj)
-    
-    transactions = []
-    for account in ofx.accounts:
-        for tx in account.statement.transactions:
-            transactions.append({
-                "date": tx.date,
-                "amount": tx.amount,
-                "description": tx.memo,
-                "id": tx.id
-            })
-    return transactions
+    # Binary mode: the charset is read from the OFX header
+    with open(file_path, "rb") as fileobj:
+        return TransactionBatch().extend(iter_ofx_transactions(fileobj))
 
 def parse_pdf(file_path):
     print(f"Parsing PDF: {file_path}")
     # Defines a basic strategy for PDFs - this usually requires customization per bank
-    transactions = []
+    transactions = TransactionBatch()
     with pdfplumber.open(file_path) as pdf:
         for page in pdf.pages:
             text = page.extract_text()
@@ -58,7 +49,7 @@ def parse_pdf(file_path):
 def import_transactions(file_path, user_id, account_id):
     ext = os.path.splitext(file_path)[1].lower()
     
-    data = []
+    data = TransactionBatch()
     if ext == '.ofx':
         data = parse_ofx(file_path)
     elif ext == '.pdf':
@@ -69,33 +60,42 @@ def import_transactions(file_path, user_id, account_id):
 
     print(f"Found {len(data)} transactions.")
     
+    # FITID is the bank's natural key: skip what was already imported into this account
+    known_fitids = set()
+    fitids = [f for f in data.fitids if f]
+    for i in range(0, len(fitids), 200):
+        response = supabase.table("transactions").select("fitid").eq("user_id", user_id).eq("account_id", account_id).in_("fitid", fitids[i:i + 200]).execute()
+        known_fitids.update(row["fitid"] for row in response.data or [])
+
     count = 0
-    for tx in data:
-        # Check for duplicates?
-        # For now, just insert
-        
-        # Determine type
-        amount = float(tx['amount'])
-        t_type = "INCOME" if amount > 0 else "EXPENSE"
-        
+    skipped = 0
+    # Auto-categorization would go here (data.categorize); rows default to "Outros"
+    for date, t_type, amount, description, category, fitid in data.rows():
+        if fitid:
+            if fitid in known_fitids:
+                skipped += 1
+                continue
+            known_fitids.add(fitid)
+
         payload = {
             "user_id": user_id,
             "account_id": account_id,
-            "description": tx['description'],
-            "amount": abs(amount), # Store absolute value
+            "description": description,
+            "amount": str(amount), # Absolute value, exact cents
             "type": t_type,
-            "date": tx['date'].isoformat(),
+            "date": date,
             "is_paid": True,
-            "category": "Outros" # Auto-categorization would go here
+            "category": category,
+            "fitid": fitid
         }
         
         try:
             supabase.table("transactions").insert(payload).execute()
             count += 1
         except Exception as e:
-            print(f"Error inserting {tx['description']}: {e}")
+            print(f"Error inserting {description}: {e}")
 
-    print(f"Successfully imported {count} transactions.")
+    print(f"Successfully imported {count} transactions ({skipped} already imported).")
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='Import transactions from file')
@@ -0,0 +1,57 @@
+import argparse
+import os
+from supabase import create_client, Client
+from dotenv import load_dotenv
+
+load_dotenv()
+
+SUPABASE_URL = os.getenv("SUPABASE_URL") or os.getenv("VITE_SUPABASE_URL")
+SUPABASE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
+
+
+# monthly_aggregates is maintained by triggers on public.transactions
+# (see 20261026_monthly_aggregates_trigger.sql); this module only reads it
+# and runs the backfill.
+
+
+def month_key(date_str):
+    """'2026-01-13' -> '2026-01-01' (first day of the month, as stored in the table)."""
+    return f"{str(date_str)[:7]}-01"
+
+
+def fetch_month_summary(supabase, user_id, month, account_id=None):
+    """Returns the category totals of a month ('YYYY-MM') from the aggregate table."""
+    query = (
+        supabase.table("monthly_aggregates")
+        .select("account_id, category, type, total, tx_count")
+        .eq("user_id", user_id)
+        .eq("month", month_key(month))
+    )
+    if account_id:
+        query = query.eq("account_id", account_id)
+    rows = query.execute().data or []
+
+    summary = {"INCOME": 0.0, "EXPENSE": 0.0, "categories": rows}
+    for row in rows:
+        summary[row["type"]] += float(row["total"])
+    return summary
+
+
+def rebuild(supabase, user_id=None):
+    """Recomputes the aggregates from the transactions table (backfill)."""
+    response = supabase.rpc("rebuild_monthly_aggregates", {"p_user_id": user_id}).execute()
+    return response.data
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Rebuild monthly aggregates from transactions')
+    parser.add_argument('--user_id', help='Rebuild only this User UUID (default: all users)')
+    args = parser.parse_args()
+
+    if not SUPABASE_URL or not SUPABASE_KEY:
+        print("Error: SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY must be set in .env")
+        exit(1)
+
+    client: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+    rows = rebuild(client, args.user_id)
+    print(f"Monthly aggregates rebuilt: {rows} rows.")
@@ -0,0 +1,146 @@
+import bisect
+import datetime
+import io
+import os
+import zipfile
+import xml.etree.ElementTree as ET
+from transaction_batch import to_cents
+
+
+def _local(tag):
+    """'{http://www.portalfiscal.inf.br/nfe}det' -> 'det'"""
+    return tag.rsplit('}', 1)[-1]
+
+
+def _text(elem, *path):
+    """Namespace-agnostic findtext following local names: _text(prod, 'xProd')."""
+    for name in path:
+        if elem is None:
+            return None
+        elem = next((child for child in elem if _local(child.tag) == name), None)
+    if elem is None or elem.text is None:
+        return None
+    return elem.text.strip()
+
+
+def _parse_item(det):
+    prod = next((child for child in det if _local(child.tag) == "prod"), None)
+    if prod is None:
+        return None
+    ean = _text(prod, "cEAN")
+    return {
+        "item_number": int(det.get("nItem") or 0),
+        "code": _text(prod, "cProd"),
+        "ean": ean if ean != "SEM GTIN" else None,
+        "ncm": _text(prod, "NCM"),
+        "description": _text(prod, "xProd") or "Item",
+        "quantity": _text(prod, "qCom") or "1",
+        "unit": _text(prod, "uCom"),
+        "unit_price": _text(prod, "vUnCom"),
+        "total_cents": to_cents(_text(prod, "vProd") or "0"),
+    }
+
+
+def iter_nfe(fileobj):
+    """Streams the notes of one NF-e (model 55) / NFC-e (model 65) XML document.
+
+    Uses iterparse and clears each <det> as soon as it has been read; the
+    document root is cleared after every note and after each of its direct
+    children (<Signature>, <protNFe>, ...), so nothing read accumulates and
+    large notes (and files holding several) keep memory flat.
+    Yields dicts with access_key, model, number, series, issued_at (YYYY-MM-DD),
+    issuer_cnpj, issuer_name, total_cents and items.
+    """
+    note = None
+    root = None
+    depth = 0
+    for event, elem in ET.iterparse(fileobj, events=("start", "end")):
+        name = _local(elem.tag)
+        if event == "start":
+            if root is None:
+                root = elem
+            depth += 1
+            if name == "infNFe":
+                note = {"access_key": (elem.get("Id") or "").replace("NFe", ""), "items": []}
+            continue
+
+        depth -= 1
+        if depth == 1:
+            root.clear()
+        if note is None:
+            continue
+        if name == "ide":
+            note["model"] = _text(elem, "mod")
+            note["number"] = _text(elem, "nNF")
+            note["series"] = _text(elem, "serie")
+            issued = _text(elem, "dhEmi") or _text(elem, "dEmi") or ""
+            note["issued_at"] = issued[:10] or None
+            elem.clear()
+        elif name == "emit":
+            note["issuer_cnpj"] = _text(elem, "CNPJ") or _text(elem, "CPF")
+            note["issuer_name"] = _text(elem, "xFant") or _text(elem, "xNome")
+            elem.clear()
+        elif name == "det":
+            item = _parse_item(elem)
+            if item:
+                note["items"].append(item)
+            elem.clear()
+        elif name == "ICMSTot":
+            note["total_cents"] = to_cents(_text(elem, "vNF") or "0")
+        elif name == "infNFe":
+            if note.get("access_key") and note.get("issued_at") and "total_cents" in note:
+                yield note
+            note = None
+            root.clear()
+
+
+def iter_nfe_file(file_bytes, filename):
+    """Yields the notes of a single XML file or of every XML inside a ZIP archive.
+
+    ZIP members are decompressed as a stream, one at a time.
+    """
+    ext = os.path.splitext(filename)[1].lower()
+    if ext == ".xml":
+        yield from iter_nfe(io.BytesIO(file_bytes))
+    elif ext == ".zip":
+        with zipfile.ZipFile(io.BytesIO(file_bytes)) as archive:
+            for member in archive.infolist():
+                if member.is_dir() or not member.filename.lower().endswith(".xml"):
+                    continue
+                try:
+                    with archive.open(member) as fileobj:
+                        yield from iter_nfe(fileobj)
+                except ET.ParseError as e:
+                    print(f"Skipping invalid XML {member.filename}: {e}")
+    else:
+        raise Exception(f"Formato {ext} não suportado para notas fiscais.")
+
+
+def match_notes(notes, transactions, window_days=3):
+    """Pairs notes with existing expense transactions of the same amount.
+
+    `transactions` are rows with id, date and amount. They are sorted once by
+    (cents, date), and each note does a binary search for its exact total,
+    then takes the unused transaction closest to its issue date within
+    `window_days`. Returns {access_key: transaction_id}.
+    """
+    index = sorted(
+        (to_cents(tx["amount"]), datetime.date.fromisoformat(str(tx["date"])[:10]).toordinal(), tx["id"])
+        for tx in transactions
+    )
+    used = set()
+    matches = {}
+    for note in notes:
+        cents = note["total_cents"]
+        day = datetime.date.fromisoformat(note["issued_at"]).toordinal()
+        pos = bisect.bisect_left(index, (cents, day - window_days, ""))
+        best = None
+        while pos < len(index) and index[pos][0] == cents and index[pos][1] <= day + window_days:
+            tx_id = index[pos][2]
+            if tx_id not in used and (best is None or abs(index[pos][1] - day) < abs(best[1] - day)):
+                best = index[pos]
+            pos += 1
+        if best is not None:
+            used.add(best[2])
+            matches[note["access_key"]] = best[2]
+    return matches
@@ -0,0 +1,133 @@
+import codecs
+import html
+import re
+from decimal import Decimal, InvalidOperation
+
+READ_SIZE = 64 * 1024
+HEADER_SIZE = 4096
+
+# OFX 1.x (SGML) header: "CHARSET:1252", "ENCODING:USASCII"
+_SGML_CHARSET = re.compile(rb'CHARSET:\s*([\w-]+)')
+_SGML_ENCODING = re.compile(rb'ENCODING:\s*([\w-]+)')
+# OFX 2.x (XML) header: <?xml version="1.0" encoding="UTF-8"?>
+_XML_ENCODING = re.compile(rb'<\?xml[^>]*encoding=["\']([\w-]+)["\']', re.IGNORECASE)
+
+_TX_OPEN = "<STMTTRN>"
+_TX_CLOSE = "</STMTTRN>"
+# Leaf elements: SGML leaves have no closing tag, XML ones do; the value ends at '<' or newline either way
+_FIELD = re.compile(r'<([A-Z0-9.]+)>([^<\r\n]*)')
+_ACCTID = re.compile(r'<ACCTID>([^<\r\n]*)')
+
+_CHARSETS = {
+    "1252": "cp1252",
+    "WINDOWS-1252": "cp1252",
+    "ISO-8859-1": "latin-1",
+    "8859-1": "latin-1",
+    "UTF-8": "utf-8",
+}
+
+
+def detectar_charset(head):
+    """Returns the Python codec declared in the first bytes of an OFX file."""
+    match = _XML_ENCODING.search(head)
+    if match:
+        return _CHARSETS.get(match.group(1).decode("ascii").upper(), match.group(1).decode("ascii"))
+
+    encoding = _SGML_ENCODING.search(head)
+    if encoding and encoding.group(1).upper() == b"UTF-8":
+        return "utf-8"
+    charset = _SGML_CHARSET.search(head)
+    if charset:
+        return _CHARSETS.get(charset.group(1).decode("ascii").upper(), "cp1252")
+    # Brazilian banks almost always export Windows-1252 when nothing is declared
+    return "cp1252"
+
+
+def _parse_date(value):
+    """'20260105120000[-3:BRT]' -> '2026-01-05'"""
+    value = value.strip()
+    if len(value) < 8 or not value[:8].isdigit():
+        return None
+    return f"{value[0:4]}-{value[4:6]}-{value[6:8]}"
+
+
+def _parse_amount(value):
+    # Some banks write the decimal separator as a comma
+    value = value.strip().replace(",", ".")
+    try:
+        return Decimal(value)
+    except InvalidOperation:
+        return None
+
+
+def _parse_block(block, account):
+    fields = {}
+    for tag, value in _FIELD.findall(block):
+        fields.setdefault(tag, value.strip())
+
+    date = _parse_date(fields.get("DTPOSTED", ""))
+    amount = _parse_amount(fields.get("TRNAMT", ""))
+    if date is None or amount is None:
+        return None
+
+    # Text fields may carry SGML/XML entities ("P&amp;G"), decoded like ofxparse did
+    memo, name, fitid = (html.unescape(fields.get(tag, "")) for tag in ("MEMO", "NAME", "FITID"))
+    return {
+        "date": date,
+        "amount": amount,
+        "description": memo or name or "Transação s/ desc.",
+        "fitid": fitid or None,
+        "trntype": fields.get("TRNTYPE"),
+        "account": account,
+    }
+
+
+def iter_ofx_transactions(fileobj, read_size=READ_SIZE):
+    """Streams the <STMTTRN> blocks of an OFX 1.x (SGML) or 2.x (XML) file.
+
+    `fileobj` must be opened in binary mode. The charset is taken from the
+    header and the body is decoded incrementally, so only the current chunk
+    plus one partial block is ever held in memory. Yields dicts with date
+    (YYYY-MM-DD), amount (Decimal), description, fitid, trntype and the
+    ACCTID of the statement the transaction belongs to.
+    """
+    head = fileobj.read(max(read_size, HEADER_SIZE))
+    if not head:
+        return
+    decoder = codecs.getincrementaldecoder(detectar_charset(head[:HEADER_SIZE]))(errors="replace")
+
+    buffer = ""
+    account = None
+    chunk = head
+    while True:
+        final = not chunk
+        buffer += decoder.decode(chunk, final=final)
+
+        pos = 0
+        while True:
+            start = buffer.find(_TX_OPEN, pos)
+            if start < 0:
+                break
+            # Account ids appear between statements, before their transactions
+            for match in _ACCTID.finditer(buffer, pos, start):
+                account = match.group(1).strip()
+            end = buffer.find(_TX_CLOSE, start)
+            if end < 0:
+                break
+            tx = _parse_block(buffer[start + len(_TX_OPEN):end], account)
+            if tx:
+                yield tx
+            pos = end + len(_TX_CLOSE)
+
+        if final:
+            return
+
+        # Keep only the unfinished block (or a tail that may hold a split tag)
+        start = buffer.find(_TX_OPEN, pos)
+        if start < 0:
+            for match in _ACCTID.finditer(buffer, pos):
+                if match.end() < len(buffer):
+                    account = match.group(1).strip()
+            start = max(pos, len(buffer) - 64)
+        buffer = buffer[start:]
+        chunk = fileobj.read(read_size)
@@ -1,8 +1,10 @@
-import re
 import pandas as pd
 import PyPDF2
 import sys
 import os
+import exportador
+from extrato_scanner import escanear_extrato
+from transaction_batch import cents_to_decimal
 
 def extrair_texto_pdf(caminho_pdf):
     """Extrai o texto de todas as páginas de um arquivo PDF."""
@@ -39,51 +41,20 @@ def categorizar_transacao(descricao):
 
 def processar_extrato(texto):
     """Processa o texto extraído para encontrar e estruturar as transações."""
-    linhas = texto.split('\n')
     transacoes = []
-    data_atual = None
-    
-    # Corrected Regex for Date: "01 de Janeiro de 2026"
-    regex_data = re.compile(r'(\d+)\s+de\s+(\w+)\s+de\s+(\d{4})')
-    
-    meses = {
-        "Janeiro": "01", "Fevereiro": "02", "Março": "03", "Abril": "04",
-        "Maio": "05", "Junho": "06", "Julho": "07", "Agosto": "08",
-        "Setembro": "09", "Outubro": "10", "Novembro": "11", "Dezembro": "12"
-    }
-
-    for linha in linhas:
-        linha = linha.strip()
-        if not linha: continue
+    linhas, divergencias = escanear_extrato(texto)
+    for data, descricao_bruta, valor_cents in linhas:
+        transacoes.append({
+            "Data": data.strftime("%d/%m/%Y"),
+            "Descrição": descricao_bruta,
+            "Valor": cents_to_decimal(valor_cents),
+            "Categoria": categorizar_transacao(descricao_bruta)
+        })
 
-        match_data = regex_data.search(linha)
-        if match_data:
-            dia, mes_nome, ano = match_data.groups()
-            mes = meses.get(mes_nome, "01")
-            data_atual = f"{dia.zfill(2)}/{mes}/{ano}"
-            continue
-
-        # Corrected Regex for Transaction: "Description R$ 100,00 R$ 100,00"
-        # Assuming format: Description | Amount | Balance (ignoring balance)
-        regex_transacao = re.compile(r'(.+?)\s+(-?R\$\s*[\d.,]+)\s+(R\$\s*[\d.,]+)$')
-        
-        match_trans = regex_transacao.search(linha)
-
-        if match_trans and data_atual:
-            descricao_bruta = match_trans.group(1).strip()
-            valor_str = match_trans.group(2).replace('R$', '').replace('.', '').replace(',', '.').replace(' ', '').strip()
-            
-            try:
-                valor = float(valor_str)
-                categoria = categorizar_transacao(descricao_bruta)
-                transacoes.append({
-                    "Data": data_atual,
-                    "Descrição": descricao_bruta,
-                    "Valor": valor,
-                    "Categoria": categoria
-                })
-            except ValueError:
-                continue
+    # O saldo de cada linha deve bater com o anterior + valor; se não bater, alguma linha se perdeu
+    for d in divergencias:
+        print(f"Aviso: saldo divergente na linha {d['linha']} ({d['descricao']}): "
+              f"esperado {d['saldo_esperado'] / 100:.2f}, extrato mostra {d['saldo_extrato'] / 100:.2f}")
     return pd.DataFrame(transacoes)
 
 def main():
@@ -103,14 +74,23 @@ def main():
         df = processar_extrato(texto_extraido)
         
         if not df.empty:
-            caminho_csv_saida = os.path.join(os.getcwd(), "extrato_categorizado.csv")
-            caminho_xlsx_saida = os.path.join(os.getcwd(), "extrato_categorizado.xlsx")
+            # CSV e Parquet por padrão; XLSX (openpyxl, bem mais lento) só com --xlsx
+            formatos = ["csv", "parquet"]
+            if "--xlsx" in sys.argv:
+                formatos.append("xlsx")
+
+            colunas = list(df.columns)
+            caminhos = []
+            for formato in formatos:
+                caminho_saida = os.path.join(os.getcwd(), f"extrato_categorizado.{formato}")
+                try:
+                    exportador.WRITERS[formato](exportador.dataframe_chunks(df), colunas, caminho_saida)
+                    caminhos.append(caminho_saida)
+                except Exception as e:
+                    print(f"Aviso: não foi possível gerar '{caminho_saida}': {e}")
 
-            df.to_csv(caminho_csv_saida, index=False, encoding='utf-8-sig')
-            df.to_excel(caminho_xlsx_saida, index=False)
-            
             print(f"\nProcessamento concluído! {len(df)} transações encontradas.")
-            print(f"Resultados salvos em '{caminho_csv_saida}' e '{caminho_xlsx_saida}'.")
+            print(f"Resultados salvos em: {', '.join(repr(c) for c in caminhos)}.")
             print("\nResumo por Categoria:")
             resumo = df.groupby('Categoria')['Valor'].sum().reset_index()
             print(resumo)
@@ -0,0 +1,173 @@
+import json
+import os
+import threading
+import time
+
+
+class QuoteNotFound(Exception):
+    """The provider answered, but has no usable price for the ticker."""
+
+
+class QuoteProvider:
+    """Interface for quote sources used by /search and sync_investments.
+
+    get_quote(ticker) returns {"ticker", "name", "price", "currency"} or
+    raises: QuoteNotFound when the ticker has no price, any other exception
+    for transport errors (those are retried by the FetchScheduler).
+    """
+
+    name = "base"
+
+    def get_quote(self, ticker):
+        raise NotImplementedError
+
+    def lookup(self, ticker):
+        """Ticker search (/search): same shape as get_quote, but "price" may be
+        None for a known ticker without a current price. Defaults to get_quote."""
+        return self.get_quote(ticker)
+
+
+class YFinanceProvider(QuoteProvider):
+    name = "yfinance"
+
+    def lookup(self, ticker):
+        import yfinance as yf
+
+        # A name is enough for search, and no history() round trip on misses
+        info = yf.Ticker(ticker).info or {}
+        if not any(key in info for key in ('longName', 'shortName', 'regularMarketPrice', 'currentPrice')):
+            raise QuoteNotFound(ticker)
+
+        price = info.get('currentPrice') or info.get('regularMarketPrice')
+        return {
+            "ticker": ticker,
+            "name": info.get('longName') or info.get('shortName') or ticker,
+            "price": float(price) if price is not None else None,
+            "currency": info.get('currency', 'BRL'),
+        }
+
+    def get_quote(self, ticker):
+        import yfinance as yf
+
+        stock = yf.Ticker(ticker)
+        info = stock.info or {}
+
+        # Try 'currentPrice' first, then 'regularMarketPrice', then history
+        price = info.get('currentPrice') or info.get('regularMarketPrice')
+        if price is None:
+            hist = stock.history(period="1d")
+            if not hist.empty:
+                price = hist['Close'].iloc[-1]
+
+        if price is None:
+            raise QuoteNotFound(ticker)
+
+        return {
+            "ticker": ticker,
+            "name": info.get('longName') or info.get('shortName') or ticker,
+            "price": float(price),
+            "currency": info.get('currency', 'BRL'),
+        }
+
+
+class ReplayProvider(QuoteProvider):
+    """Offline provider backed by a JSON fixture {ticker: quote | null}.
+
+    mode="replay" only reads the fixture (a null entry means "not found").
+    mode="record" forwards to `upstream` and stores every answer, so a real
+    sync can be captured once and replayed in tests and benchmarks.
+    `latency` (seconds) simulates network time on replay.
+    """
+
+    name = "replay"
+
+    def __init__(self, path, mode="replay", upstream=None, latency=0.0):
+        if mode not in ("replay", "record"):
+            raise ValueError(f"Invalid mode '{mode}'")
+        if mode == "record" and upstream is None:
+            upstream = YFinanceProvider()
+        self.path = path
+        self.mode = mode
+        self.upstream = upstream
+        self.latency = latency
+        self._lock = threading.Lock()
+        self.quotes = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self.quotes = json.load(f)
+
+    def get_quote(self, ticker):
+        if self.mode == "record":
+            try:
+                quote = self.upstream.get_quote(ticker)
+            except QuoteNotFound:
+                quote = None
+            with self._lock:
+                self.quotes[ticker] = quote
+                self.save()
+        else:
+            if self.latency:
+                time.sleep(self.latency)
+            if ticker not in self.quotes:
+                raise QuoteNotFound(f"{ticker} (not in fixture {self.path})")
+            quote = self.quotes[ticker]
+
+        if quote is None:
+            raise QuoteNotFound(ticker)
+        return quote
+
+    def save(self):
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump(self.quotes, f, indent=2, sort_keys=True)
+
+
+class CachedQuoteProvider(QuoteProvider):
+    """In-process TTL cache in front of another provider.
+
+    Used for quotes and, with a longer TTL, for FX pairs (which are just
+    tickers like "USDBRL=X"), so within one process a symbol is fetched once
+    per TTL no matter how many shards or holdings need it. Separate worker
+    processes don't share it. "Not found" answers are cached too.
+    """
+
+    def __init__(self, inner, ttl=300.0):
+        self.inner = inner
+        self.ttl = ttl
+        self.name = f"cached-{inner.name}"
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get_quote(self, ticker):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(ticker)
+        if entry and entry[0] > now:
+            if entry[1] is None:
+                raise QuoteNotFound(ticker)
+            return entry[1]
+
+        try:
+            quote = self.inner.get_quote(ticker)
+        except QuoteNotFound:
+            quote = None
+        with self._lock:
+            self._entries[ticker] = (now + self.ttl, quote)
+        if quote is None:
+            raise QuoteNotFound(ticker)
+        return quote
+
+    def lookup(self, ticker):
+        # Search answers differ from quotes (price may be None): not cached
+        return self.inner.lookup(ticker)
+
+
+def get_provider():
+    """Builds the provider selected by QUOTE_PROVIDER (yfinance | replay | record).
+
+    replay/record use the fixture at QUOTE_FIXTURE (default: quotes_fixture.json).
+    """
+    kind = (os.getenv("QUOTE_PROVIDER") or "yfinance").lower()
+    if kind == "yfinance":
+        return YFinanceProvider()
+    fixture = os.getenv("QUOTE_FIXTURE") or os.path.join(os.path.dirname(__file__), "quotes_fixture.json")
+    return ReplayProvider(fixture, mode=kind)
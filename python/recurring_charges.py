@@ -0,0 +1,133 @@
+import re
+import unicodedata
+import datetime
+import numpy as np
+
+# Cadence name -> (expected interval in days, tolerance in days)
+CADENCES = {
+    "weekly": (7, 2),
+    "monthly": (30, 4),
+    "yearly": (365, 10),
+}
+
+# Max relative spread of the amounts around the median to count as "stable"
+AMOUNT_TOLERANCE = 0.15
+MIN_OCCURRENCES = 3
+
+# Bank prefixes that say nothing about the merchant itself
+_NOISE_PREFIXES = re.compile(
+    r'^(COMPRA (NO )?(CARTAO|DEBITO|CREDITO)|PAGAMENTO (DE )?BOLETO|PIX ENVIADO|PIX RECEBIDO|DEBITO AUTOMATICO|DEB AUT|PG \*|PAG \*)\s*'
+)
+_NOISE_CHARS = re.compile(r'[^A-Z ]+')
+_SPACES = re.compile(r'\s+')
+
+
+def normalizar_estabelecimento(descricao):
+    """Normaliza a descrição para agrupar cobranças do mesmo estabelecimento.
+
+    Remove acentos, dígitos (datas, parcelas, códigos de autorização) e
+    prefixos genéricos do banco, ex: "NETFLIX.COM 12/03" -> "NETFLIX COM".
+    """
+    texto = unicodedata.normalize("NFKD", str(descricao or "")).encode("ascii", "ignore").decode("ascii")
+    texto = texto.upper().strip()
+    texto = _NOISE_PREFIXES.sub("", texto)
+    texto = _NOISE_CHARS.sub(" ", texto)
+    return _SPACES.sub(" ", texto).strip()
+
+
+def _is_expense(tx):
+    tx_type = tx.get("type")
+    if tx_type:
+        return str(tx_type).upper() == "EXPENSE"
+    return float(tx.get("amount") or 0) < 0
+
+
+def _classify_cadence(interval):
+    for cadence, (days, tolerance) in CADENCES.items():
+        if abs(interval - days) <= tolerance:
+            return cadence
+    return None
+
+
+def detect_recurring(transactions, min_occurrences=MIN_OCCURRENCES, merchants=None):
+    """Detects recurring charges (subscriptions) in a list of transactions.
+
+    Each transaction is a dict with 'date' (YYYY-MM-DD), 'amount', 'description'
+    and optionally 'type'. Only expenses are considered. The whole history is
+    loaded into NumPy arrays and sorted once by (merchant, date); every group is
+    then a contiguous slice, so the cost is dominated by the O(n log n) sort.
+
+    If `merchants` is given, only those normalized merchant keys are evaluated.
+    """
+    rows = [tx for tx in transactions if _is_expense(tx)]
+    if not rows:
+        return []
+
+    keys = [normalizar_estabelecimento(tx.get("description")) for tx in rows]
+    merchant_names, codes = np.unique(np.array(keys, dtype=object), return_inverse=True)
+    dates = np.array([str(tx["date"])[:10] for tx in rows], dtype="datetime64[D]")
+    cents = np.rint(np.abs(np.array([float(tx.get("amount") or 0) for tx in rows])) * 100).astype(np.int64)
+
+    order = np.lexsort((dates, codes))
+    codes = codes[order]
+    dates = dates[order]
+    cents = cents[order]
+
+    # Group boundaries: positions where the merchant code changes
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(codes)) + 1))
+    ends = np.concatenate((starts[1:], [len(codes)]))
+    sizes = ends - starts
+
+    # Day gaps between consecutive charges of the same merchant (the gap that
+    # crosses a group boundary is meaningless and never read)
+    gaps = np.diff(dates).astype(np.int64)
+
+    results = []
+    for start, end, size in zip(starts, ends, sizes):
+        if size < min_occurrences:
+            continue
+        merchant = merchant_names[codes[start]]
+        if not merchant or (merchants is not None and merchant not in merchants):
+            continue
+
+        group_gaps = gaps[start:end - 1]
+        # Same-day duplicates (e.g. split charges) do not define a cadence
+        group_gaps = group_gaps[group_gaps > 0]
+        if len(group_gaps) < min_occurrences - 1:
+            continue
+
+        interval = float(np.median(group_gaps))
+        cadence = _classify_cadence(interval)
+        if cadence is None:
+            continue
+
+        # Most gaps must agree with the cadence, not just the median
+        _, tolerance = CADENCES[cadence]
+        on_cadence = np.abs(group_gaps - interval) <= tolerance
+        if on_cadence.mean() < 0.75:
+            continue
+
+        group_cents = cents[start:end]
+        median_cents = float(np.median(group_cents))
+        if median_cents <= 0:
+            continue
+        spread = float(np.max(np.abs(group_cents - median_cents))) / median_cents
+        if spread > AMOUNT_TOLERANCE:
+            continue
+
+        last_date = dates[end - 1].astype(datetime.date)
+        next_date = last_date + datetime.timedelta(days=int(round(interval)))
+        results.append({
+            "merchant": merchant,
+            "cadence": cadence,
+            "interval_days": round(interval, 1),
+            "average_amount": round(float(group_cents.mean()) / 100, 2),
+            "last_amount": int(group_cents[-1]) / 100,
+            "occurrences": int(size),
+            "first_date": dates[start].astype(datetime.date).isoformat(),
+            "last_date": last_date.isoformat(),
+            "next_expected_date": next_date.isoformat(),
+        })
+
+    results.sort(key=lambda r: r["average_amount"], reverse=True)
+    return results
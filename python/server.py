@@ -1,14 +1,20 @@
 import os
-import yfinance as yf
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response, stream_with_context
 from flask_cors import CORS
 from sync_investments import sync_investments
 import threading
 from bank_import_service import BankImportService
+import monthly_aggregates
+import exportador
+from quote_providers import get_provider, QuoteNotFound
+from fetch_scheduler import FetchScheduler
 
 app = Flask(__name__)
 CORS(app)
 import_service = BankImportService()
+quote_provider = get_provider()
+# Shared by all /search requests so the concurrency limit and circuit breaker are global
+search_scheduler = FetchScheduler(max_concurrency=4, initial_concurrency=2, retries=1, no_retry=(QuoteNotFound,))
 
 @app.route('/health', methods=['GET'])
 def health():
@@ -23,34 +29,18 @@ def search_ticker():
     query = query.strip().upper()
     print(f"Searching for: {query}...")
     
-    results = []
-    
-    # Try different suffixes if not present (BR market mostly)
+    # Try different suffixes if not present (BR market mostly), all in parallel
     suffixes = ['', '.SA']
-    
-    for suffix in suffixes:
-        try:
-            full_ticker = query + suffix if not query.endswith(suffix) else query
-            
-            # yfinance search is sometimes slow or limited, let's try direct ticker fetch first
-            ticker = yf.Ticker(full_ticker)
-            info = ticker.info
-            
-            # Check if we got valid data (some key fields usually present)
-            if info and ('longName' in info or 'shortName' in info or 'regularMarketPrice' in info or 'currentPrice' in info):
-               
-               price = info.get('currentPrice') or info.get('regularMarketPrice')
-               name = info.get('longName') or info.get('shortName') or full_ticker
-               
-               results.append({
-                   "ticker": full_ticker,
-                   "name": name,
-                   "price": price,
-                   "currency": info.get('currency', 'BRL')
-               })
-        except Exception as e:
-            print(f"Error checking {full_ticker}: {e}")
+    candidates = [query + suffix if not query.endswith(suffix) else query for suffix in suffixes]
+
+    results = []
+    for full_ticker, quote in search_scheduler.map(quote_provider.lookup, candidates).items():
+        if isinstance(quote, QuoteNotFound):
+            continue
+        if isinstance(quote, Exception):
+            print(f"Error checking {full_ticker}: {quote}")
             continue
+        results.append(quote)
 
     # Also try generic yfinance search if single lookup failed or to add more options
     # Note: yf.Search is not always reliable in the python library, 
@@ -70,7 +60,8 @@ def trigger_sync():
     def run_job():
         try:
             print("Starting manual sync job...")
-            sync_investments()
+            # Deliberate re-sync: don't skip shards the cron synced recently
+            sync_investments(min_interval_seconds=0)
             print("Manual sync job finished.")
         except Exception as e:
             print(f"Manual sync failed: {e}")
@@ -91,11 +82,12 @@ def parse_bank_statement():
             return jsonify({"error": "No selected file"}), 400
         
         file_bytes = file.read()
-        transactions = import_service.parse_file(file_bytes, file.filename)
+        batch, warnings = import_service.parse_file(file_bytes, file.filename)
         
         return jsonify({
             "status": "success", 
-            "transactions": transactions
+            "transactions": batch.to_dicts(),
+            "warnings": warnings
         })
     except Exception as e:
         print(f"Parse failed: {e}")
@@ -123,6 +115,103 @@ def save_imported_transactions():
         print(f"Save failed: {e}")
         return jsonify({"error": str(e)}), 500
 
+@app.route('/recurring', methods=['GET'])
+def recurring_charges():
+    user_id = request.args.get('user_id')
+    if not user_id:
+        return jsonify({"error": "Missing query parameter 'user_id'"}), 400
+
+    try:
+        # Kept up to date by each import; ?refresh=1 re-detects over the full history
+        if request.args.get('refresh') in ('1', 'true'):
+            import_service.refresh_recurring_charges(user_id)
+        charges = import_service.list_recurring_charges(user_id)
+        return jsonify({"status": "success", "recurring": charges})
+    except Exception as e:
+        print(f"Recurring detection failed: {e}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/summary', methods=['GET'])
+def monthly_summary():
+    user_id = request.args.get('user_id')
+    month = request.args.get('month')  # YYYY-MM
+    account_id = request.args.get('account_id')
+    if not user_id or not month:
+        return jsonify({"error": "Missing query parameters 'user_id' and 'month'"}), 400
+
+    try:
+        summary = monthly_aggregates.fetch_month_summary(import_service.supabase, user_id, month, account_id)
+        return jsonify({"status": "success", "month": month, **summary})
+    except Exception as e:
+        print(f"Summary failed: {e}")
+        return jsonify({"error": str(e)}), 500
+
+EXPORT_COLUMNS = ["date", "description", "amount", "type", "category", "account_id", "is_paid"]
+# Fixed Parquet types: pages arrive one by one, so they can't be inferred from the first
+EXPORT_TYPES = {
+    "date": "string", "description": "string", "amount": "float64", "type": "string",
+    "category": "string", "account_id": "string", "is_paid": "bool",
+}
+EXPORT_MIMETYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+@app.route('/export', methods=['GET'])
+def export_transactions():
+    user_id = request.args.get('user_id')
+    start_date = request.args.get('start')
+    end_date = request.args.get('end')
+    fmt = (request.args.get('format') or 'csv').lower()
+
+    if not user_id:
+        return jsonify({"error": "Missing query parameter 'user_id'"}), 400
+    if fmt not in EXPORT_MIMETYPES:
+        return jsonify({"error": f"Unsupported format '{fmt}'. Use csv or parquet."}), 400
+
+    # Pages are fetched lazily while the response is being sent
+    pages = import_service.iter_user_transactions(
+        user_id, ", ".join(EXPORT_COLUMNS), start_date=start_date, end_date=end_date
+    )
+    if fmt == 'csv':
+        body = exportador.iter_csv(pages, EXPORT_COLUMNS, bom=True)
+    else:
+        body = exportador.iter_parquet(pages, EXPORT_COLUMNS, EXPORT_TYPES)
+
+    filename = f"transacoes_{start_date or 'inicio'}_{end_date or 'hoje'}.{fmt}"
+    return Response(
+        stream_with_context(body),
+        mimetype=EXPORT_MIMETYPES[fmt],
+        headers={"Content-Disposition": f"attachment; filename={filename}"},
+    )
+
+@app.route('/import-fiscal', methods=['POST'])
+def import_fiscal_notes():
+    try:
+        if 'file' not in request.files:
+            return jsonify({"error": "No file part"}), 400
+
+        file = request.files['file']
+        user_id = request.form.get('user_id')
+        account_id = request.form.get('account_id')
+
+        if not user_id:
+            return jsonify({"error": "Missing user_id"}), 400
+
+        if file.filename == '':
+            return jsonify({"error": "No selected file"}), 400
+
+        totals = import_service.import_fiscal_notes(file.read(), file.filename, user_id, account_id)
+
+        return jsonify({
+            "status": "success",
+            "message": f"Imported {totals['notes']} fiscal notes ({totals['matched']} matched to existing transactions).",
+            **totals
+        })
+    except Exception as e:
+        print(f"Fiscal import failed: {e}")
+        return jsonify({"error": str(e)}), 500
+
 @app.route('/import', methods=['POST'])
 def import_bank_statement():
     # Keep /import as a one-shot shortcut just in case
@@ -1,8 +1,15 @@
+import argparse
+import math
 import os
-import yfinance as yf
+import multiprocessing
 from supabase import create_client, Client
 from dotenv import load_dotenv
 import datetime
+import time
+from quote_providers import get_provider, CachedQuoteProvider, QuoteNotFound
+from fetch_scheduler import FetchScheduler
+import sync_leases
+import fx_rates
 
 # Load environment variables
 load_dotenv()
@@ -21,78 +28,140 @@ if not SUPABASE_KEY:
 
 supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
 
-def sync_investments():
-    print(f"Starting investment sync at {datetime.datetime.now()}")
-    
-    # 1. Fetch investments with tickers
-    response = supabase.table("investments").select("*").not_.is_("ticker", "null").execute()
-    investments = response.data
-    
-    if not investments:
-        print("No investments with tickers found.")
-        return
+# Quotes and FX pairs are cached per process, each with its own TTL: shards synced
+# by the same process share them, but each `--workers` process (and each host)
+# keeps its own cache and fetches a pair at least once itself
+QUOTE_CACHE_TTL = float(os.getenv("QUOTE_CACHE_TTL", "300"))
+_base_provider = get_provider()
+quote_cache = CachedQuoteProvider(_base_provider, QUOTE_CACHE_TTL)
+fx_cache = CachedQuoteProvider(_base_provider, fx_rates.FX_TTL)
+
+def sanitize_ticker(ticker):
+    # Common user error: "BTC USD" -> "BTC-USD"
+    return ticker.strip().upper().replace(" ", "-")
+
+def sync_investments(provider=None, scheduler=None, worker_id=None, fx_provider=None,
+                     min_interval_seconds=sync_leases.MIN_INTERVAL_SECONDS):
+    """Syncs every shard this worker manages to claim.
+
+    Any number of these can run at once (cron, /sync, `--workers N`, other
+    hosts): shards are handed out through leases in sync_leases, so no shard
+    is synced twice and a crashed worker's shard is retried once its lease expires.
+
+    Shards completed less than `min_interval_seconds` ago are skipped (the cron
+    keeps the default; the manual /sync passes 0). Shards completed after this
+    run started are always skipped, so the loop ends even with 0.
+    """
+    worker_id = worker_id or sync_leases.new_worker_id()
+    print(f"Starting investment sync at {datetime.datetime.now()} (worker {worker_id})")
+    provider = provider or quote_cache
+    fx_provider = fx_provider or fx_cache
+    scheduler = scheduler or FetchScheduler(no_retry=(QuoteNotFound,))
 
-    print(f"Found {len(investments)} investments to sync.")
+    run_started = time.monotonic()
+    shards = 0
+    while True:
+        since_start = int(time.monotonic() - run_started) + 1
+        lease = sync_leases.claim_shard(supabase, worker_id,
+                                        min_interval_seconds=max(min_interval_seconds, since_start))
+        if lease is None:
+            break
 
+        with lease:
+            # 1. Fetch investments with tickers of this shard
+            response = supabase.rpc("get_investments_for_shard", {
+                "p_shard": lease.shard, "p_shard_count": sync_leases.SHARD_COUNT,
+            }).execute()
+            investments = response.data or []
+            print(f"Shard {lease.shard}: {len(investments)} investments to sync.")
+            if investments:
+                sync_batch(investments, provider, scheduler, lease, fx_provider)
+        shards += 1
+
+    print(f"Worker {worker_id} finished: {shards} shard(s) synced.")
+    return shards
+
+def sync_batch(investments, provider, scheduler, lease=None, fx_provider=None):
+    # 2. Fetch each distinct ticker once, in parallel, through the scheduler
+    tickers = [sanitize_ticker(inv["ticker"]) for inv in investments if inv.get("ticker")]
+    started = datetime.datetime.now()
+    quotes = scheduler.map(provider.get_quote, tickers)
+    elapsed = (datetime.datetime.now() - started).total_seconds()
+    print(f"Fetched {len(quotes)} quotes from {provider.name} in {elapsed:.2f}s")
+
+    priced = []
     for inv in investments:
         ticker = inv.get("ticker")
         if not ticker:
             continue
-            
-        # Sanitize ticker (common user error: "BTC USD" -> "BTC-USD")
-        ticker = ticker.strip().upper().replace(" ", "-")
-        
+        ticker = sanitize_ticker(ticker)
+        quote = quotes.get(ticker)
+        if isinstance(quote, QuoteNotFound):
+            print(f"  Warning: Could not fetch price for {ticker}")
+        elif isinstance(quote, Exception):
+            print(f"  Error syncing {ticker}: {quote}")
+        else:
+            priced.append((inv, ticker, quote))
+    if not priced:
+        return
+
+    # 3. One FX rate per currency, then every holding converted to BRL at once
+    currencies = [quote.get("currency") or fx_rates.BASE_CURRENCY for _, _, quote in priced]
+    rates = fx_rates.fetch_rates(currencies, fx_provider or provider, scheduler)
+    quantities = [float(inv.get("quantity") or 0) for inv, _, _ in priced]
+    native, fx, brl = fx_rates.convert([q["price"] for _, _, q in priced], quantities, currencies, rates)
+
+    # 4. Update Supabase
+    for k, (inv, ticker, quote) in enumerate(priced):
+        if lease is not None and lease.lost:
+            print(f"  Shard {lease.shard} is now owned by another worker, stopping.")
+            return
+
         print(f"Syncing {ticker} for investment ID {inv['id']}...")
-        
         try:
-            # 2. Fetch data from yfinance
-            stock = yf.Ticker(ticker)
-            # Try to get the fast info (often faster and reliable for current price)
-            price = None
-            
-            # Different strategies to get price depending on asset type (basic logic)
-            # Try 'currentPrice' first, then 'regularMarketPrice', then history
-            info = stock.info
-            
-            if 'currentPrice' in info:
-                price = info['currentPrice']
-            elif 'regularMarketPrice' in info:
-                price = info['regularMarketPrice']
-            else:
-                # Fallback to history
-                hist = stock.history(period="1d")
-                if not hist.empty:
-                    price = hist['Close'].iloc[-1]
-            
-            if price is None:
-                print(f"  Warning: Could not fetch price for {ticker}")
-                continue
-                
-            print(f"  Current price: {price}")
-            
-            # 3. Update Supabase
-            quantity = inv.get("quantity", 0)
-            if quantity is None: quantity = 0
-            quantity = float(quantity)
+            price = float(quote["price"])
+            currency = currencies[k]
+            quantity = quantities[k]
 
             update_data = {
                 "last_sync": datetime.datetime.now().isoformat(),
-                "current_price": float(price)
+                "current_price": price,
+                "currency": currency
             }
 
             if quantity > 0:
-                new_amount = float(price) * quantity
-                update_data["amount"] = new_amount
-                print(f"  Updating {ticker}: Price={price:.2f}, Qty={quantity}, New Amount={new_amount:.2f}")
+                update_data["amount_native"] = float(native[k])
+                if not math.isnan(fx[k]):
+                    update_data["fx_rate"] = float(fx[k])
+                    update_data["amount"] = float(brl[k])
+                    print(f"  Updating {ticker}: Price={price:.2f} {currency}, Qty={quantity}, "
+                          f"Amount={native[k]:.2f} {currency} = {brl[k]:.2f} BRL")
+                else:
+                    print(f"  Warning: no {currency}->BRL rate, updating {ticker} native amount only")
             else:
-                print(f"  Updating {ticker}: Price={price:.2f} (Qty is 0, skipping amount update)")
+                print(f"  Updating {ticker}: Price={price:.2f} {currency} (Qty is 0, skipping amount update)")
 
             supabase.table("investments").update(update_data).eq("id", inv["id"]).execute()
-            
+
             print(f"  Sync complete for {ticker}")
-            
+
         except Exception as e:
             print(f"  Error syncing {ticker}: {e}")
 
+def run_workers(count):
+    """Starts `count` worker processes that share the shards through leases."""
+    workers = [multiprocessing.Process(target=sync_investments) for _ in range(count)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+
 if __name__ == "__main__":
-    sync_investments()
+    parser = argparse.ArgumentParser(description='Sync investment prices')
+    parser.add_argument('--workers', type=int, default=1, help='Number of worker processes on this host')
+    args = parser.parse_args()
+
+    if args.workers > 1:
+        run_workers(args.workers)
+    else:
+        sync_investments()
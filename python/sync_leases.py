@@ -0,0 +1,77 @@
+import os
+import socket
+import threading
+import uuid
+
+SYNC_JOB = "investments"
+SHARD_COUNT = int(os.getenv("SYNC_SHARDS", "16"))
+LEASE_SECONDS = int(os.getenv("SYNC_LEASE_SECONDS", "300"))
+# A shard synced less than this long ago is not claimed again (cron + /sync overlap)
+MIN_INTERVAL_SECONDS = int(os.getenv("SYNC_MIN_INTERVAL_SECONDS", "600"))
+
+
+def new_worker_id():
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+class ShardLease:
+    """A claimed shard. Renews its lease in the background until released.
+
+    Use as a context manager: the shard is marked completed when the block
+    exits normally and just released (left for another worker) on error.
+    """
+
+    def __init__(self, supabase, job, shard, owner, lease_seconds=LEASE_SECONDS):
+        self.supabase = supabase
+        self.job = job
+        self.shard = shard
+        self.owner = owner
+        self.lease_seconds = lease_seconds
+        self.lost = False
+        self._stop = threading.Event()
+        self._heartbeat = threading.Thread(target=self._renew_loop, daemon=True)
+
+    def _renew_loop(self):
+        while not self._stop.wait(self.lease_seconds / 3):
+            try:
+                response = self.supabase.rpc("renew_sync_shard", {
+                    "p_job": self.job, "p_shard": self.shard,
+                    "p_owner": self.owner, "p_lease_seconds": self.lease_seconds,
+                }).execute()
+                if response.data is False:
+                    print(f"  Lease on shard {self.shard} was lost")
+                    self.lost = True
+                    return
+            except Exception as e:
+                # Transient error: the lease is still valid until it expires, try again next beat
+                print(f"  Error renewing lease on shard {self.shard}: {e}")
+
+    def release(self, completed):
+        self._stop.set()
+        self.supabase.rpc("release_sync_shard", {
+            "p_job": self.job, "p_shard": self.shard,
+            "p_owner": self.owner, "p_completed": completed and not self.lost,
+        }).execute()
+
+    def __enter__(self):
+        self._heartbeat.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release(exc_type is None)
+        return False
+
+
+def claim_shard(supabase, owner, job=SYNC_JOB, shard_count=SHARD_COUNT,
+                lease_seconds=LEASE_SECONDS, min_interval_seconds=MIN_INTERVAL_SECONDS):
+    """Claims the next free shard; returns a ShardLease or None when all shards are done or taken."""
+    response = supabase.rpc("claim_sync_shard", {
+        "p_job": job,
+        "p_owner": owner,
+        "p_shard_count": shard_count,
+        "p_lease_seconds": lease_seconds,
+        "p_min_interval_seconds": min_interval_seconds,
+    }).execute()
+    if response.data is None:
+        return None
+    return ShardLease(supabase, job, int(response.data), owner, lease_seconds)
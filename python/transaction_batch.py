@@ -0,0 +1,156 @@
+import datetime
+import sys
+import time
+from array import array
+from decimal import Decimal, ROUND_HALF_UP
+
+DEFAULT_CATEGORY = "Outros"
+_CENT = Decimal("0.01")
+
+
+def to_cents(value):
+    """Converts an amount (Decimal, str, int or float) to integer cents, exactly.
+
+    Floats go through str() so 0.1 + 0.2 style representation errors never
+    reach the database: to_cents(-12.5) == -1250, to_cents("1.005") == 101.
+    """
+    if not isinstance(value, Decimal):
+        value = Decimal(str(value).strip().replace(",", "."))
+    return int((value.quantize(_CENT, rounding=ROUND_HALF_UP) * 100).to_integral_value())
+
+
+def cents_to_decimal(cents):
+    return (Decimal(cents) / 100).quantize(_CENT)
+
+
+class TransactionBatch:
+    """Struct of arrays holding the transactions of one import.
+
+    Parsers append to it, categorization fills the category codes and the save
+    path reads it directly; rows only become dicts at the HTTP boundary
+    (to_dicts) or as Supabase payloads. Amounts are signed integer cents
+    (negative = EXPENSE), dates are proleptic ordinals, descriptions are
+    interned and categories are small codes into `categories`. `incomes`
+    flags INCOME rows explicitly, so a zero amount keeps its declared type.
+    """
+
+    __slots__ = ("dates", "cents", "incomes", "descriptions", "fitids", "category_codes", "categories",
+                 "_category_index")
+
+    def __init__(self):
+        self.dates = array("l")
+        self.cents = array("q")
+        self.incomes = array("b")
+        self.descriptions = []
+        self.fitids = []
+        self.category_codes = array("h")
+        self.categories = []
+        self._category_index = {}
+
+    def __len__(self):
+        return len(self.cents)
+
+    def __bool__(self):
+        return len(self.cents) > 0
+
+    def _category_code(self, category):
+        code = self._category_index.get(category)
+        if code is None:
+            code = len(self.categories)
+            self.categories.append(category)
+            self._category_index[category] = code
+        return code
+
+    def append(self, date, amount, description, fitid=None, category=None):
+        """Adds one row. `date` is 'YYYY-MM-DD' or a date, `amount` is signed."""
+        self.append_cents(date, to_cents(amount), description, fitid, category)
+
+    def append_cents(self, date, cents, description, fitid=None, category=None, tx_type=None):
+        """Same as append() for amounts already parsed into signed integer cents.
+
+        `tx_type` ('INCOME' | 'EXPENSE') overrides the sign; by default
+        positive amounts are INCOME.
+        """
+        if not isinstance(date, datetime.date):
+            date = datetime.date.fromisoformat(str(date)[:10])
+        if tx_type is None:
+            tx_type = "INCOME" if cents > 0 else "EXPENSE"
+        self.dates.append(date.toordinal())
+        self.cents.append(cents)
+        self.incomes.append(tx_type == "INCOME")
+        self.descriptions.append(sys.intern(str(description)))
+        self.fitids.append(fitid or None)
+        self.category_codes.append(self._category_code(category or DEFAULT_CATEGORY))
+
+    def extend(self, rows):
+        for row in rows:
+            self.append(row["date"], row["amount"], row["description"], row.get("fitid"))
+        return self
+
+    @classmethod
+    def from_dicts(cls, rows):
+        """Builds a batch from JSON rows (e.g. the /save-imported body).
+
+        The row's 'type' wins over the amount's sign, since the user may have
+        edited it in the preview.
+        """
+        batch = cls()
+        for row in rows:
+            cents = abs(to_cents(row["amount"]))
+            tx_type = row.get("type")
+            if tx_type == "EXPENSE" or (tx_type is None and str(row["amount"]).strip().startswith("-")):
+                cents = -cents
+            if tx_type not in ("INCOME", "EXPENSE"):
+                tx_type = None
+            batch.append_cents(row["date"], cents, row["description"], row.get("fitid"), row.get("category"), tx_type)
+        return batch
+
+    def date_str(self, i):
+        return datetime.date.fromordinal(self.dates[i]).isoformat()
+
+    def type_of(self, i):
+        return "INCOME" if self.incomes[i] else "EXPENSE"
+
+    def category_of(self, i):
+        return self.categories[self.category_codes[i]]
+
+    def categorize(self, categorizer):
+        """Fills the category codes, calling `categorizer` once per distinct description."""
+        cache = {}
+        for i, description in enumerate(self.descriptions):
+            code = cache.get(description)
+            if code is None:
+                code = self._category_code(categorizer(description))
+                cache[description] = code
+            self.category_codes[i] = code
+        return self
+
+    def rows(self):
+        """Yields (date, type, abs amount as Decimal, description, category, fitid) tuples."""
+        for i in range(len(self.cents)):
+            yield (
+                self.date_str(i),
+                self.type_of(i),
+                cents_to_decimal(abs(self.cents[i])),
+                self.descriptions[i],
+                self.category_of(i),
+                self.fitids[i],
+            )
+
+    def to_dicts(self):
+        """JSON rows for the import preview, with temporary ids for frontend selection."""
+        stamp = int(time.time())
+        result = []
+        for i in range(len(self.cents)):
+            row = {
+                "id": f"tmp_{i}_{stamp}",
+                "date": self.date_str(i),
+                "amount": float(cents_to_decimal(self.cents[i])),
+                "description": self.descriptions[i],
+                "category": self.category_of(i),
+                "type": self.type_of(i),
+            }
+            if self.fitids[i]:
+                row["fitid"] = self.fitids[i]
+            result.append(row)
+        return result
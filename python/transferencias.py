@@ -0,0 +1,73 @@
+import bisect
+import datetime
+import re
+from transaction_batch import to_cents
+
+# Same keywords categorizar_transacao uses for "Transferência", plus the spelled-out
+# forms, as whole words: "DOCERIA", "HOTEL LIMITED" or "PIXOTE" are not transfers
+REGEX_TRANSFERENCIA = re.compile(r'\b(?:PIX|TED|DOC|TRANSF\w*)\b')
+
+
+def eh_transferencia(tx):
+    """A row that may be one side of a transfer between the user's own accounts."""
+    if tx.get("category") == "Transferência":
+        return True
+    return REGEX_TRANSFERENCIA.search((tx.get("description") or "").upper()) is not None
+
+
+def _sorted_side(rows, tx_type):
+    return sorted(
+        (to_cents(tx["amount"]), datetime.date.fromisoformat(str(tx["date"])[:10]).toordinal(), tx["account_id"], tx["id"])
+        for tx in rows
+        if tx["type"] == tx_type
+    )
+
+
+def pair_transfers(rows, window_days=2):
+    """Pairs outgoing and incoming transfers of the same amount between different accounts.
+
+    Both sides are sorted by (cents, date) and merged like a sort-merge join,
+    so the cost is O(n log n) instead of comparing every pair. Within a group
+    of equal amounts each outgoing row takes the closest unused incoming row
+    from another account at most `window_days` away. Returns [(out_id, in_id)].
+    """
+    rows = [tx for tx in rows if tx.get("account_id")]
+    saidas = _sorted_side(rows, "EXPENSE")
+    entradas = _sorted_side(rows, "INCOME")
+
+    pairs = []
+    i = j = 0
+    while i < len(saidas) and j < len(entradas):
+        cents_out, cents_in = saidas[i][0], entradas[j][0]
+        if cents_out < cents_in:
+            i += 1
+            continue
+        if cents_in < cents_out:
+            j += 1
+            continue
+
+        # Equal-amount groups on both sides (already date-ordered)
+        i_end = i
+        while i_end < len(saidas) and saidas[i_end][0] == cents_out:
+            i_end += 1
+        j_end = j
+        while j_end < len(entradas) and entradas[j_end][0] == cents_in:
+            j_end += 1
+
+        grupo_entradas = entradas[j:j_end]
+        dias = [e[1] for e in grupo_entradas]
+        usados = set()
+        for _, dia, conta, out_id in saidas[i:i_end]:
+            melhor = None
+            k = bisect.bisect_left(dias, dia - window_days)
+            while k < len(dias) and dias[k] <= dia + window_days:
+                _, dia_in, conta_in, in_id = grupo_entradas[k]
+                if k not in usados and conta_in != conta and (melhor is None or abs(dia_in - dia) < abs(dias[melhor] - dia)):
+                    melhor = k
+                k += 1
+            if melhor is not None:
+                usados.add(melhor)
+                pairs.append((out_id, grupo_entradas[melhor][3]))
+
+        i, j = i_end, j_end
+    return pairs
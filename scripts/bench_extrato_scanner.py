@@ -0,0 +1,99 @@
+"""Benchmark of the statement line scanner against the previous per-line loop.
+
+Builds a synthetic multi-year statement in the Banco Inter PDF text layout
+and times both implementations on it (no PDF decoding involved).
+
+    python scripts/bench_extrato_scanner.py --dias 3650 --por-dia 8
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "python"))
+
+from extrato_scanner import escanear_extrato
+
+NOMES_MESES = ["Janeiro", "Fevereiro", "Março", "Abril", "Maio", "Junho", "Julho",
+               "Agosto", "Setembro", "Outubro", "Novembro", "Dezembro"]
+
+
+def formatar(cents):
+    sinal = "-" if cents < 0 else ""
+    reais, centavos = divmod(abs(cents), 100)
+    return f"{sinal}R$ {reais:,}".replace(",", ".") + f",{centavos:02d}"
+
+
+def gerar_texto(dias, por_dia):
+    linhas = []
+    saldo = 100000
+    data = datetime.date(2016, 1, 1)
+    for _ in range(dias):
+        linhas.append(f"{data.day} de {NOMES_MESES[data.month - 1]} de {data.year} Saldo do dia: {formatar(saldo)}")
+        for _ in range(por_dia):
+            valor = random.randint(-50000, 40000)
+            if saldo + valor < 0:
+                # The old regex drops lines with a negative balance; keep the comparison fair
+                valor = -valor
+            saldo += valor
+            linhas.append(f'Compra no debito: "No estabelecimento LOJA {random.randint(1, 500)} NATAL BRA" {formatar(valor)} {formatar(saldo)}')
+        if random.random() < 0.05:
+            linhas.append("SAC: 0800 940 9999 (opção 09) Ouvidoria: 0800 940 7772")
+        data += datetime.timedelta(days=1)
+    return "\n".join(linhas)
+
+
+def loop_anterior(texto):
+    """The loop previously inlined in parse_pdf / processar_extrato."""
+    linhas = texto.split('\n')
+    transacoes = []
+    data_atual = None
+    regex_data = re.compile(r'(\d+)\s+de\s+(\w+)\s+de\s+(\d{4})')
+    meses = {nome: f"{i + 1:02d}" for i, nome in enumerate(NOMES_MESES)}
+    for linha in linhas:
+        linha = linha.strip()
+        if not linha: continue
+        match_data = regex_data.search(linha)
+        if match_data:
+            dia, mes_nome, ano = match_data.groups()
+            data_atual = f"{ano}-{meses.get(mes_nome.capitalize(), '01')}-{dia.zfill(2)}"
+            continue
+        regex_transacao = re.compile(r'(.+?)\s+(-?R\$\s*[\d.,]+)\s+(R\$\s*[\d.,]+)$')
+        match_trans = regex_transacao.search(linha)
+        if match_trans and data_atual:
+            valor_str = match_trans.group(2).replace('R$', '').replace('.', '').replace(',', '.').replace(' ', '').strip()
+            try:
+                transacoes.append((data_atual, match_trans.group(1).strip(), float(valor_str)))
+            except ValueError:
+                continue
+    return transacoes
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark statement line scanning')
+    parser.add_argument('--dias', type=int, default=3650)
+    parser.add_argument('--por-dia', type=int, default=8)
+    args = parser.parse_args()
+
+    texto = gerar_texto(args.dias, args.por_dia)
+    print(f"{len(texto.splitlines())} linhas")
+
+    inicio = time.perf_counter()
+    antigas = loop_anterior(texto)
+    t_antigo = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    novas, divergencias = escanear_extrato(texto)
+    t_novo = time.perf_counter() - inicio
+
+    soma_float = sum(v for _, _, v in antigas)
+    soma_cents = sum(v for _, _, v in novas)
+    print(f"Loop anterior: {t_antigo:.3f}s, {len(antigas)} transações, soma {soma_float!r}")
+    print(f"Scanner:       {t_novo:.3f}s, {len(novas)} transações, soma {soma_cents / 100:.2f}, {len(divergencias)} divergências")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Offline benchmark of the quote FetchScheduler (no network, no Supabase).
+
+Replays a synthetic fixture with simulated latency and a throttling rate,
+comparing the old serial loop against the scheduler.
+
+    python scripts/bench_quotes.py --tickers 200 --latency 0.05 --throttle 0.1
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "python"))
+
+from quote_providers import QuoteProvider, ReplayProvider, QuoteNotFound
+from fetch_scheduler import FetchScheduler
+
+
+class ThrottlingProvider(QuoteProvider):
+    """Wraps a provider and fails a fraction of calls like a rate-limited API."""
+
+    name = "throttled-replay"
+
+    def __init__(self, inner, rate):
+        self.inner = inner
+        self.rate = rate
+
+    def get_quote(self, ticker):
+        if random.random() < self.rate:
+            raise Exception("Too Many Requests")
+        return self.inner.get_quote(ticker)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark quote fetching offline')
+    parser.add_argument('--tickers', type=int, default=200)
+    parser.add_argument('--latency', type=float, default=0.05, help='Simulated seconds per call')
+    parser.add_argument('--throttle', type=float, default=0.1, help='Fraction of calls that fail')
+    args = parser.parse_args()
+
+    tickers = [f"TICK{i}.SA" for i in range(args.tickers)]
+    fixture = {t: {"ticker": t, "name": t, "price": round(random.uniform(5, 100), 2), "currency": "BRL"} for t in tickers}
+    with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False) as f:
+        json.dump(fixture, f)
+
+    provider = ThrottlingProvider(ReplayProvider(f.name, latency=args.latency), args.throttle)
+
+    started = time.perf_counter()
+    serial_ok = 0
+    for t in tickers:
+        try:
+            provider.get_quote(t)
+            serial_ok += 1
+        except Exception:
+            pass
+    serial = time.perf_counter() - started
+
+    scheduler = FetchScheduler(max_concurrency=16, base_delay=0.01, max_delay=0.2, no_retry=(QuoteNotFound,))
+    started = time.perf_counter()
+    results = scheduler.map(provider.get_quote, tickers)
+    parallel = time.perf_counter() - started
+    parallel_ok = sum(1 for r in results.values() if not isinstance(r, Exception))
+
+    os.unlink(f.name)
+    print(f"Serial loop:     {serial:.2f}s, {serial_ok}/{len(tickers)} quotes")
+    print(f"FetchScheduler:  {parallel:.2f}s, {parallel_ok}/{len(tickers)} quotes "
+          f"(final limit {scheduler.limiter.limit:.1f}, breaker {scheduler.breaker.state})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Offline check of the chunked exporters across several chunks.
+
+The first chunks are chosen so the schema inferred from them is too narrow
+for later ones (small Decimal amounts, integer amounts, all-null columns),
+which is what the Parquet schema widening has to cover.
+
+    python scripts/verify_exportador.py
+"""
+import os
+import sys
+import tempfile
+from decimal import Decimal
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "python"))
+
+import exportador
+
+COLUMNS = ["Data", "Descrição", "Valor", "Total", "Categoria"]
+
+ROWS = [
+    {"Data": "2026-01-02", "Descrição": "Padaria", "Valor": Decimal("-1.50"), "Total": 10, "Categoria": None},
+    {"Data": "2026-01-03", "Descrição": "Mercado", "Valor": Decimal("-4.99"), "Total": 20, "Categoria": None},
+    {"Data": "2026-01-04", "Descrição": "Salário", "Valor": Decimal("12345.67"), "Total": 10.5, "Categoria": "Salário"},
+    {"Data": "2026-01-05", "Descrição": "Aluguel", "Valor": Decimal("-98765432.10"), "Total": None, "Categoria": "Moradia"},
+    {"Data": "2026-01-06", "Descrição": "Pix", "Valor": Decimal("0.10"), "Total": 3, "Categoria": "Transferência"},
+]
+
+
+def check_parquet(path):
+    import pyarrow.parquet as pq
+
+    written = exportador.write_parquet(exportador.iter_chunks(ROWS, chunk_size=2), COLUMNS, path)
+    assert written == len(ROWS), written
+    parquet = pq.ParquetFile(path)
+    assert parquet.metadata.num_row_groups == 3, parquet.metadata.num_row_groups
+    values = parquet.read().column("Valor").to_pylist()
+    assert values == [row["Valor"] for row in ROWS], values
+
+    streamed = b"".join(exportador.iter_parquet(exportador.iter_chunks(ROWS, chunk_size=2), COLUMNS))
+    with open(path, "rb") as f:
+        assert streamed == f.read()
+    print(f"Parquet OK: {written} rows in {parquet.metadata.num_row_groups} row groups")
+
+
+# Same shape as the /export pages: is_paid is all null on the first page
+EXPORT_COLUMNS = ["date", "amount", "is_paid"]
+EXPORT_TYPES = {"date": "string", "amount": "float64", "is_paid": "bool"}
+EXPORT_PAGES = [
+    [{"date": "2026-01-01", "amount": 10, "is_paid": None}, {"date": "2026-01-02", "amount": 2, "is_paid": None}],
+    [{"date": "2026-01-03", "amount": 10.5, "is_paid": True}],
+]
+
+
+def check_parquet_fixed_types(path):
+    import pyarrow.parquet as pq
+
+    streamed = b"".join(exportador.iter_parquet(iter(EXPORT_PAGES), EXPORT_COLUMNS, EXPORT_TYPES))
+    with open(path, "wb") as f:
+        f.write(streamed)
+    table = pq.read_table(path)
+    assert table.column("is_paid").to_pylist() == [None, None, True], table
+    assert str(table.schema.field("is_paid").type) == "bool", table.schema
+
+    # No rows at all: still a valid Parquet file with the schema
+    empty = b"".join(exportador.iter_parquet(iter([]), EXPORT_COLUMNS, EXPORT_TYPES))
+    with open(path, "wb") as f:
+        f.write(empty)
+    table = pq.read_table(path)
+    assert table.num_rows == 0 and table.schema.names == EXPORT_COLUMNS, table
+    print(f"Parquet OK: fixed types across pages, empty export is {len(empty)} bytes")
+
+
+def check_csv(path):
+    written = exportador.write_csv(exportador.iter_chunks(ROWS, chunk_size=2), COLUMNS, path)
+    with open(path, encoding="utf-8-sig") as f:
+        lines = f.read().splitlines()
+    assert written == len(ROWS) and len(lines) == len(ROWS) + 1, lines
+    assert lines[4].startswith("2026-01-05,Aluguel,-98765432.10,"), lines[4]
+    print(f"CSV OK: {written} rows")
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as tmp:
+        check_csv(os.path.join(tmp, "export.csv"))
+        check_parquet(os.path.join(tmp, "export.parquet"))
+        check_parquet_fixed_types(os.path.join(tmp, "export_fixed.parquet"))
@@ -1,5 +1,6 @@
 import { supabase } from './supabase';
 import { Transaction, TransactionType } from '../types';
+import { splitSummaryRange } from '../utils/helpers';
 
 export const transactionService = {
   /**
@@ -79,7 +80,8 @@ export const transactionService = {
       isPaid: t.is_paid,
       installments: t.installments,
       installmentNumber: t.installment_number,
-      originalTransactionId: t.original_transaction_id
+      originalTransactionId: t.original_transaction_id,
+      transferPairId: t.transfer_pair_id
     })) : [];
   },
 
@@ -298,7 +300,8 @@ export const transactionService = {
       isPaid: updatedData.is_paid,
       installments: updatedData.installments,
       installmentNumber: updatedData.installment_number,
-      originalTransactionId: updatedData.original_transaction_id
+      originalTransactionId: updatedData.original_transaction_id,
+      transferPairId: updatedData.transfer_pair_id
     };
   },
 
@@ -308,24 +311,43 @@ export const transactionService = {
   async getTransactionSummary(userId: string, options: { startDate?: string; endDate?: string }): Promise<{ totalIncome: number; totalExpense: number }> {
     if (!userId) return { totalIncome: 0, totalExpense: 0 };
 
-    let query = supabase
-      .from('transactions')
-      .select('amount, type')
-      .eq('user_id', userId);
-
-    if (options.startDate) query = query.gte('date', options.startDate);
-    if (options.endDate) query = query.lte('date', options.endDate);
-
-    const { data, error } = await query;
+    const totals = { totalIncome: 0, totalExpense: 0 };
+    const add = (type: string, amount: number) => {
+      if (type === 'INCOME') totals.totalIncome += amount;
+      else if (type === 'EXPENSE') totals.totalExpense += amount;
+    };
 
-    if (error) throw new Error(error.message);
+    // Meses inteiros do período vêm de monthly_aggregates (mantida por trigger);
+    // só as pontas de meses parciais são somadas a partir das transações.
+    const { months, edges } = splitSummaryRange(options.startDate, options.endDate);
+
+    if (months) {
+      let aggQuery = supabase
+        .from('monthly_aggregates')
+        .select('type, total')
+        .eq('user_id', userId);
+      if (months.fullStart) aggQuery = aggQuery.gte('month', months.fullStart);
+      if (months.fullEnd) aggQuery = aggQuery.lt('month', months.fullEnd);
+
+      const { data, error } = await aggQuery;
+      if (error) throw new Error(error.message);
+      data.forEach(row => add(row.type, Number(row.total || 0)));
+    }
 
-    const totals = data.reduce((acc, t) => {
-      const amount = Number(t.amount || 0);
-      if (t.type === 'INCOME') acc.totalIncome += amount;
-      else if (t.type === 'EXPENSE') acc.totalExpense += amount;
-      return acc;
-    }, { totalIncome: 0, totalExpense: 0 });
+    for (const [from, to] of edges) {
+      // Transferências pareadas ficam fora, como em monthly_aggregates
+      let query = supabase
+        .from('transactions')
+        .select('amount, type')
+        .eq('user_id', userId)
+        .is('transfer_pair_id', null);
+      if (from) query = query.gte('date', from);
+      if (to) query = query.lte('date', to);
+
+      const { data, error } = await query;
+      if (error) throw new Error(error.message);
+      data.forEach(t => add(t.type, Number(t.amount || 0)));
+    }
 
     return totals;
   }
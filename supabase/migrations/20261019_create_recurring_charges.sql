@@ -0,0 +1,35 @@
+-- Migration: Create recurring_charges table
+-- Stores subscriptions / recurring charges detected by the Python import service
+
+CREATE TABLE IF NOT EXISTS public.recurring_charges (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    user_id UUID NOT NULL REFERENCES auth.users(id) ON DELETE CASCADE,
+    merchant TEXT NOT NULL,
+    cadence TEXT NOT NULL CHECK (cadence IN ('weekly', 'monthly', 'yearly')),
+    interval_days NUMERIC(6, 1),
+    average_amount NUMERIC(15, 2) NOT NULL,
+    last_amount NUMERIC(15, 2),
+    occurrences INTEGER NOT NULL DEFAULT 0,
+    first_date DATE,
+    last_date DATE,
+    next_expected_date DATE,
+    created_at TIMESTAMPTZ DEFAULT now(),
+    updated_at TIMESTAMPTZ DEFAULT now(),
+    UNIQUE (user_id, merchant)
+);
+
+-- Enable RLS
+ALTER TABLE public.recurring_charges ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Users can view their own recurring charges"
+    ON public.recurring_charges FOR SELECT
+    USING (auth.uid() = user_id);
+
+CREATE POLICY "Users can delete their own recurring charges"
+    ON public.recurring_charges FOR DELETE
+    USING (auth.uid() = user_id);
+
+-- Backend (service_role) writes the detections
+GRANT ALL ON public.recurring_charges TO service_role;
+
+CREATE INDEX IF NOT EXISTS idx_recurring_charges_user_next ON public.recurring_charges(user_id, next_expected_date);
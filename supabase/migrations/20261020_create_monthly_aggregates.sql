@@ -0,0 +1,81 @@
+-- Migration: Materialized monthly aggregates per (user, account, month, category, type)
+-- Maintained incrementally by the Python import service (apply_monthly_aggregate_deltas)
+-- and rebuildable for backfills (rebuild_monthly_aggregates).
+
+CREATE TABLE IF NOT EXISTS public.monthly_aggregates (
+    user_id UUID NOT NULL REFERENCES auth.users(id) ON DELETE CASCADE,
+    account_id UUID REFERENCES public.accounts(id) ON DELETE CASCADE,
+    month DATE NOT NULL, -- first day of the month
+    category TEXT NOT NULL DEFAULT 'Outros',
+    type TEXT NOT NULL CHECK (type IN ('INCOME', 'EXPENSE')),
+    total NUMERIC(15, 2) NOT NULL DEFAULT 0,
+    tx_count INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMPTZ DEFAULT now(),
+    CONSTRAINT monthly_aggregates_key UNIQUE NULLS NOT DISTINCT (user_id, account_id, month, category, type)
+);
+
+ALTER TABLE public.monthly_aggregates ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Users can view their own monthly aggregates"
+    ON public.monthly_aggregates FOR SELECT
+    USING (auth.uid() = user_id);
+
+GRANT ALL ON public.monthly_aggregates TO service_role;
+
+CREATE INDEX IF NOT EXISTS idx_monthly_aggregates_user_month ON public.monthly_aggregates(user_id, month);
+
+-- Applies a batch of deltas: [{user_id, account_id, month, category, type, total, tx_count}, ...]
+CREATE OR REPLACE FUNCTION public.apply_monthly_aggregate_deltas(p_deltas JSONB)
+RETURNS VOID AS $$
+BEGIN
+  INSERT INTO public.monthly_aggregates AS m (user_id, account_id, month, category, type, total, tx_count, updated_at)
+  SELECT
+    (d->>'user_id')::UUID,
+    NULLIF(d->>'account_id', '')::UUID,
+    (d->>'month')::DATE,
+    COALESCE(d->>'category', 'Outros'),
+    d->>'type',
+    (d->>'total')::NUMERIC,
+    (d->>'tx_count')::INTEGER,
+    now()
+  FROM jsonb_array_elements(p_deltas) AS d
+  ON CONFLICT ON CONSTRAINT monthly_aggregates_key DO UPDATE
+  SET total = m.total + EXCLUDED.total,
+      tx_count = m.tx_count + EXCLUDED.tx_count,
+      updated_at = now();
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+-- Recomputes the aggregates from public.transactions (all users when p_user_id is NULL)
+CREATE OR REPLACE FUNCTION public.rebuild_monthly_aggregates(p_user_id UUID DEFAULT NULL)
+RETURNS INTEGER AS $$
+DECLARE
+  v_rows INTEGER;
+BEGIN
+  DELETE FROM public.monthly_aggregates
+  WHERE p_user_id IS NULL OR user_id = p_user_id;
+
+  INSERT INTO public.monthly_aggregates (user_id, account_id, month, category, type, total, tx_count, updated_at)
+  SELECT
+    t.user_id,
+    t.account_id,
+    date_trunc('month', t.date)::DATE,
+    COALESCE(t.category, 'Outros'),
+    upper(t.type::TEXT),
+    SUM(t.amount),
+    COUNT(*),
+    now()
+  FROM public.transactions t
+  WHERE (p_user_id IS NULL OR t.user_id = p_user_id)
+    AND upper(t.type::TEXT) IN ('INCOME', 'EXPENSE')
+  GROUP BY 1, 2, 3, 4, 5;
+
+  GET DIAGNOSTICS v_rows = ROW_COUNT;
+  RETURN v_rows;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+REVOKE ALL ON FUNCTION public.apply_monthly_aggregate_deltas(JSONB) FROM PUBLIC, anon, authenticated;
+REVOKE ALL ON FUNCTION public.rebuild_monthly_aggregates(UUID) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.apply_monthly_aggregate_deltas(JSONB) TO service_role;
+GRANT EXECUTE ON FUNCTION public.rebuild_monthly_aggregates(UUID) TO service_role;
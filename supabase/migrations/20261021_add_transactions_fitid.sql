@@ -0,0 +1,10 @@
+-- Migration: OFX FITID on transactions
+-- FITID is the bank's own transaction id; it is unique per account and is used
+-- by the Python importers to skip rows that were already imported.
+
+ALTER TABLE public.transactions
+ADD COLUMN IF NOT EXISTS fitid TEXT;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_transactions_account_fitid
+    ON public.transactions(user_id, account_id, fitid) NULLS NOT DISTINCT
+    WHERE fitid IS NOT NULL;
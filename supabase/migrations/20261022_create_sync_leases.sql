@@ -0,0 +1,98 @@
+-- Migration: Lease-based sharding for the Python investment sync
+-- Investments are split into shards by hash(user_id). Each worker (cron, /sync,
+-- extra processes on other hosts) claims one shard at a time through a lease row;
+-- a shard whose lease expires (crashed worker) is claimed again by the next worker.
+-- All workers must use the same shard count (SYNC_SHARDS).
+
+CREATE TABLE IF NOT EXISTS public.sync_leases (
+    job TEXT NOT NULL,
+    shard INTEGER NOT NULL,
+    owner TEXT,
+    claimed_at TIMESTAMPTZ,
+    lease_expires_at TIMESTAMPTZ,
+    last_completed_at TIMESTAMPTZ,
+    PRIMARY KEY (job, shard)
+);
+
+-- Only the backend (service_role) touches leases
+ALTER TABLE public.sync_leases ENABLE ROW LEVEL SECURITY;
+GRANT ALL ON public.sync_leases TO service_role;
+
+-- Claims a free shard: not leased (or lease expired) and not completed within p_min_interval_seconds.
+-- Returns the shard number, or NULL when there is nothing left to do.
+CREATE OR REPLACE FUNCTION public.claim_sync_shard(
+    p_job TEXT,
+    p_owner TEXT,
+    p_shard_count INTEGER,
+    p_lease_seconds INTEGER,
+    p_min_interval_seconds INTEGER
+)
+RETURNS INTEGER AS $$
+DECLARE
+  v_shard INTEGER;
+BEGIN
+  INSERT INTO public.sync_leases (job, shard)
+  SELECT p_job, g FROM generate_series(0, p_shard_count - 1) AS g
+  ON CONFLICT (job, shard) DO NOTHING;
+
+  UPDATE public.sync_leases l
+  SET owner = p_owner,
+      claimed_at = now(),
+      lease_expires_at = now() + make_interval(secs => p_lease_seconds)
+  WHERE (l.job, l.shard) = (
+    SELECT c.job, c.shard
+    FROM public.sync_leases c
+    WHERE c.job = p_job
+      AND c.shard < p_shard_count
+      AND (c.lease_expires_at IS NULL OR c.lease_expires_at < now())
+      AND (c.last_completed_at IS NULL OR c.last_completed_at < now() - make_interval(secs => p_min_interval_seconds))
+    ORDER BY c.last_completed_at NULLS FIRST, c.shard
+    LIMIT 1
+    FOR UPDATE SKIP LOCKED
+  )
+  RETURNING l.shard INTO v_shard;
+
+  RETURN v_shard;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+-- Extends a lease still held by p_owner. Returns false if the lease was lost.
+CREATE OR REPLACE FUNCTION public.renew_sync_shard(p_job TEXT, p_shard INTEGER, p_owner TEXT, p_lease_seconds INTEGER)
+RETURNS BOOLEAN AS $$
+BEGIN
+  UPDATE public.sync_leases
+  SET lease_expires_at = now() + make_interval(secs => p_lease_seconds)
+  WHERE job = p_job AND shard = p_shard AND owner = p_owner;
+  RETURN FOUND;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+-- Releases a lease; p_completed marks the shard as synced now.
+CREATE OR REPLACE FUNCTION public.release_sync_shard(p_job TEXT, p_shard INTEGER, p_owner TEXT, p_completed BOOLEAN)
+RETURNS VOID AS $$
+BEGIN
+  UPDATE public.sync_leases
+  SET owner = NULL,
+      lease_expires_at = NULL,
+      last_completed_at = CASE WHEN p_completed THEN now() ELSE last_completed_at END
+  WHERE job = p_job AND shard = p_shard AND owner = p_owner;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+-- Investments with a ticker belonging to one shard (stable hash of user_id, same on every host)
+CREATE OR REPLACE FUNCTION public.get_investments_for_shard(p_shard INTEGER, p_shard_count INTEGER)
+RETURNS SETOF public.investments AS $$
+  SELECT *
+  FROM public.investments
+  WHERE ticker IS NOT NULL
+    AND mod(abs(hashtext(user_id::text)::BIGINT), p_shard_count) = p_shard;
+$$ LANGUAGE sql STABLE SECURITY DEFINER;
+
+REVOKE ALL ON FUNCTION public.claim_sync_shard(TEXT, TEXT, INTEGER, INTEGER, INTEGER) FROM PUBLIC, anon, authenticated;
+REVOKE ALL ON FUNCTION public.renew_sync_shard(TEXT, INTEGER, TEXT, INTEGER) FROM PUBLIC, anon, authenticated;
+REVOKE ALL ON FUNCTION public.release_sync_shard(TEXT, INTEGER, TEXT, BOOLEAN) FROM PUBLIC, anon, authenticated;
+REVOKE ALL ON FUNCTION public.get_investments_for_shard(INTEGER, INTEGER) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.claim_sync_shard(TEXT, TEXT, INTEGER, INTEGER, INTEGER) TO service_role;
+GRANT EXECUTE ON FUNCTION public.renew_sync_shard(TEXT, INTEGER, TEXT, INTEGER) TO service_role;
+GRANT EXECUTE ON FUNCTION public.release_sync_shard(TEXT, INTEGER, TEXT, BOOLEAN) TO service_role;
+GRANT EXECUTE ON FUNCTION public.get_investments_for_shard(INTEGER, INTEGER) TO service_role;
@@ -0,0 +1,45 @@
+-- Migration: NF-e / NFC-e XML import
+-- fiscal_notes gains the fields read from the invoice XML; line items go to fiscal_note_items.
+
+ALTER TABLE public.fiscal_notes
+ADD COLUMN IF NOT EXISTS access_key TEXT, -- chave de acesso (44 digits)
+ADD COLUMN IF NOT EXISTS model TEXT, -- '55' NF-e, '65' NFC-e
+ADD COLUMN IF NOT EXISTS issuer_cnpj TEXT,
+ADD COLUMN IF NOT EXISTS issuer_name TEXT,
+ADD COLUMN IF NOT EXISTS issued_at DATE,
+ADD COLUMN IF NOT EXISTS total_amount NUMERIC(15, 2);
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_fiscal_notes_user_access_key
+    ON public.fiscal_notes(user_id, access_key)
+    WHERE access_key IS NOT NULL;
+
+CREATE TABLE IF NOT EXISTS public.fiscal_note_items (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    fiscal_note_id UUID NOT NULL REFERENCES public.fiscal_notes(id) ON DELETE CASCADE,
+    user_id UUID NOT NULL REFERENCES auth.users(id) ON DELETE CASCADE,
+    item_number INTEGER,
+    code TEXT,
+    ean TEXT,
+    ncm TEXT,
+    description TEXT NOT NULL,
+    quantity NUMERIC(15, 4) DEFAULT 1,
+    unit TEXT,
+    unit_price NUMERIC(15, 4),
+    total NUMERIC(15, 2) NOT NULL DEFAULT 0,
+    created_at TIMESTAMPTZ DEFAULT now()
+);
+
+ALTER TABLE public.fiscal_note_items ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Users can view their own fiscal note items"
+    ON public.fiscal_note_items FOR SELECT
+    USING (auth.uid() = user_id);
+
+CREATE POLICY "Users can delete their own fiscal note items"
+    ON public.fiscal_note_items FOR DELETE
+    USING (auth.uid() = user_id);
+
+GRANT ALL ON public.fiscal_note_items TO service_role;
+
+CREATE INDEX IF NOT EXISTS idx_fiscal_note_items_note_id ON public.fiscal_note_items(fiscal_note_id);
+CREATE INDEX IF NOT EXISTS idx_fiscal_note_items_user_id ON public.fiscal_note_items(user_id);
@@ -0,0 +1,41 @@
+-- Migration: Transfers between the user's own accounts
+-- The Python import pairs an outgoing PIX/TED/DOC with the matching incoming one in
+-- another account of the same user; both rows point at each other through transfer_pair_id
+-- and are left out of monthly aggregates and budgets.
+
+ALTER TABLE public.transactions
+ADD COLUMN IF NOT EXISTS transfer_pair_id UUID REFERENCES public.transactions(id) ON DELETE SET NULL;
+
+CREATE INDEX IF NOT EXISTS idx_transactions_transfer_pair_id
+    ON public.transactions(transfer_pair_id)
+    WHERE transfer_pair_id IS NOT NULL;
+
+-- Rebuild now skips paired transfers, matching the incremental maintenance
+CREATE OR REPLACE FUNCTION public.rebuild_monthly_aggregates(p_user_id UUID DEFAULT NULL)
+RETURNS INTEGER AS $$
+DECLARE
+  v_rows INTEGER;
+BEGIN
+  DELETE FROM public.monthly_aggregates
+  WHERE p_user_id IS NULL OR user_id = p_user_id;
+
+  INSERT INTO public.monthly_aggregates (user_id, account_id, month, category, type, total, tx_count, updated_at)
+  SELECT
+    t.user_id,
+    t.account_id,
+    date_trunc('month', t.date)::DATE,
+    COALESCE(t.category, 'Outros'),
+    upper(t.type::TEXT),
+    SUM(t.amount),
+    COUNT(*),
+    now()
+  FROM public.transactions t
+  WHERE (p_user_id IS NULL OR t.user_id = p_user_id)
+    AND upper(t.type::TEXT) IN ('INCOME', 'EXPENSE')
+    AND t.transfer_pair_id IS NULL
+  GROUP BY 1, 2, 3, 4, 5;
+
+  GET DIAGNOSTICS v_rows = ROW_COUNT;
+  RETURN v_rows;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
@@ -0,0 +1,9 @@
+-- Migration: foreign-currency investments
+-- current_price stays in the asset's own currency; amount is always in BRL
+-- (the account currency), converted with fx_rate at sync time. amount_native
+-- keeps the position value before conversion.
+
+ALTER TABLE public.investments
+ADD COLUMN IF NOT EXISTS currency TEXT DEFAULT 'BRL',
+ADD COLUMN IF NOT EXISTS fx_rate NUMERIC(18, 8),
+ADD COLUMN IF NOT EXISTS amount_native NUMERIC(15, 2);
@@ -0,0 +1,125 @@
+-- Migration: Maintain monthly_aggregates from public.transactions with triggers
+-- Every write path (the app, the Python importers, manual SQL) now keeps the
+-- aggregates in sync inside the same transaction as the row change. The triggers
+-- are statement-level with transition tables, so a bulk insert/update/delete
+-- becomes one grouped upsert instead of one per row. Paired transfers
+-- (transfer_pair_id IS NOT NULL) are left out, matching rebuild_monthly_aggregates,
+-- so linking or unlinking a pair moves its amounts out of / back into the totals.
+
+-- Groups that reach tx_count = 0 are deleted, so an account whose transactions all
+-- moved to account_id NULL (transactions.account_id is ON DELETE SET NULL) leaves
+-- no rows behind: the triggers move its totals to the account_id NULL rows, exactly
+-- like the transactions themselves.
+CREATE OR REPLACE FUNCTION public.apply_monthly_aggregate_deltas(p_deltas JSONB)
+RETURNS VOID AS $$
+BEGIN
+  INSERT INTO public.monthly_aggregates AS m (user_id, account_id, month, category, type, total, tx_count, updated_at)
+  SELECT
+    (d->>'user_id')::UUID,
+    NULLIF(d->>'account_id', '')::UUID,
+    (d->>'month')::DATE,
+    COALESCE(d->>'category', 'Outros'),
+    d->>'type',
+    (d->>'total')::NUMERIC,
+    (d->>'tx_count')::INTEGER,
+    now()
+  FROM jsonb_array_elements(p_deltas) AS d
+  ON CONFLICT ON CONSTRAINT monthly_aggregates_key DO UPDATE
+  SET total = m.total + EXCLUDED.total,
+      tx_count = m.tx_count + EXCLUDED.tx_count,
+      updated_at = now();
+
+  DELETE FROM public.monthly_aggregates m
+  USING jsonb_array_elements(p_deltas) AS d
+  WHERE m.tx_count <= 0
+    AND m.user_id = (d->>'user_id')::UUID
+    AND m.month = (d->>'month')::DATE;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+-- One function for the three triggers (transition tables allow a single event per
+-- trigger); only the transition tables of the firing event are referenced.
+CREATE OR REPLACE FUNCTION public.monthly_aggregates_trg()
+RETURNS TRIGGER AS $$
+DECLARE
+  v_deltas JSONB;
+BEGIN
+  IF TG_OP = 'INSERT' THEN
+    SELECT jsonb_agg(g) INTO v_deltas FROM (
+      SELECT c.user_id, c.account_id, date_trunc('month', c.date)::DATE AS month,
+             COALESCE(c.category, 'Outros') AS category, upper(c.type::TEXT) AS type,
+             SUM(c.amount) AS total, COUNT(*) AS tx_count
+      FROM new_rows c
+      WHERE c.transfer_pair_id IS NULL AND upper(c.type::TEXT) IN ('INCOME', 'EXPENSE')
+      GROUP BY 1, 2, 3, 4, 5
+    ) g;
+  ELSIF TG_OP = 'DELETE' THEN
+    SELECT jsonb_agg(g) INTO v_deltas FROM (
+      SELECT c.user_id, c.account_id, date_trunc('month', c.date)::DATE AS month,
+             COALESCE(c.category, 'Outros') AS category, upper(c.type::TEXT) AS type,
+             -SUM(c.amount) AS total, -COUNT(*) AS tx_count
+      FROM old_rows c
+      WHERE c.transfer_pair_id IS NULL AND upper(c.type::TEXT) IN ('INCOME', 'EXPENSE')
+      GROUP BY 1, 2, 3, 4, 5
+    ) g;
+  ELSE
+    -- Old versions out, new versions in; unchanged rows cancel out in the grouping
+    SELECT jsonb_agg(g) INTO v_deltas FROM (
+      SELECT c.user_id, c.account_id, date_trunc('month', c.date)::DATE AS month,
+             COALESCE(c.category, 'Outros') AS category, upper(c.type::TEXT) AS type,
+             SUM(c.sign * c.amount) AS total, SUM(c.sign)::INTEGER AS tx_count
+      FROM (
+        SELECT n.user_id, n.account_id, n.date, n.category, n.type, n.amount, n.transfer_pair_id, 1 AS sign FROM new_rows n
+        UNION ALL
+        SELECT o.user_id, o.account_id, o.date, o.category, o.type, o.amount, o.transfer_pair_id, -1 AS sign FROM old_rows o
+      ) c
+      WHERE c.transfer_pair_id IS NULL AND upper(c.type::TEXT) IN ('INCOME', 'EXPENSE')
+      GROUP BY 1, 2, 3, 4, 5
+      HAVING SUM(c.sign * c.amount) <> 0 OR SUM(c.sign) <> 0
+    ) g;
+  END IF;
+
+  IF v_deltas IS NOT NULL THEN
+    PERFORM public.apply_monthly_aggregate_deltas(v_deltas);
+  END IF;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+REVOKE ALL ON FUNCTION public.monthly_aggregates_trg() FROM PUBLIC, anon, authenticated;
+
+DROP TRIGGER IF EXISTS monthly_aggregates_after_insert ON public.transactions;
+DROP TRIGGER IF EXISTS monthly_aggregates_after_update ON public.transactions;
+DROP TRIGGER IF EXISTS monthly_aggregates_after_delete ON public.transactions;
+
+CREATE TRIGGER monthly_aggregates_after_insert
+  AFTER INSERT ON public.transactions
+  REFERENCING NEW TABLE AS new_rows
+  FOR EACH STATEMENT EXECUTE FUNCTION public.monthly_aggregates_trg();
+
+CREATE TRIGGER monthly_aggregates_after_update
+  AFTER UPDATE ON public.transactions
+  REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+  FOR EACH STATEMENT EXECUTE FUNCTION public.monthly_aggregates_trg();
+
+CREATE TRIGGER monthly_aggregates_after_delete
+  AFTER DELETE ON public.transactions
+  REFERENCING OLD TABLE AS old_rows
+  FOR EACH STATEMENT EXECUTE FUNCTION public.monthly_aggregates_trg();
+
+-- ON DELETE CASCADE dropped an account's aggregates while its transactions were only
+-- detached (SET NULL). The totals now follow the transactions through the update
+-- trigger above; the foreign key just checks, at commit, that nothing is left behind.
+ALTER TABLE public.monthly_aggregates
+  DROP CONSTRAINT IF EXISTS monthly_aggregates_account_id_fkey;
+
+ALTER TABLE public.monthly_aggregates
+  ADD CONSTRAINT monthly_aggregates_account_id_fkey
+  FOREIGN KEY (account_id) REFERENCES public.accounts(id)
+  ON DELETE NO ACTION DEFERRABLE INITIALLY DEFERRED;
+
+-- The app reads the aggregates directly (dashboard/period totals)
+GRANT SELECT ON public.monthly_aggregates TO authenticated;
+
+-- Bring existing data in line with the triggers
+SELECT public.rebuild_monthly_aggregates(NULL);
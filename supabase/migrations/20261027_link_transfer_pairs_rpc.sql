@@ -0,0 +1,40 @@
+-- Migration: Link transfer pairs in a single statement
+-- Both sides of every pair are updated by one UPDATE, so a pair is never left
+-- half-linked; the monthly_aggregates triggers take the linked rows out of the
+-- totals in the same transaction. Pairs whose rows are no longer unlinked, or
+-- don't belong to the user, are skipped. Returns the number of pairs linked.
+-- p_pairs: [{"out_id": ..., "in_id": ...}, ...]
+CREATE OR REPLACE FUNCTION public.link_transfer_pairs(p_user_id UUID, p_pairs JSONB)
+RETURNS INTEGER AS $$
+DECLARE
+  v_rows INTEGER;
+BEGIN
+  WITH pairs AS (
+    SELECT (p->>'out_id')::UUID AS out_id, (p->>'in_id')::UUID AS in_id
+    FROM jsonb_array_elements(p_pairs) AS p
+  ),
+  valid AS (
+    SELECT pairs.out_id, pairs.in_id
+    FROM pairs
+    JOIN public.transactions o ON o.id = pairs.out_id
+    JOIN public.transactions i ON i.id = pairs.in_id
+    WHERE o.user_id = p_user_id AND i.user_id = p_user_id
+      AND o.transfer_pair_id IS NULL AND i.transfer_pair_id IS NULL
+  ),
+  sides AS (
+    SELECT out_id AS id, in_id AS pair_id FROM valid
+    UNION ALL
+    SELECT in_id, out_id FROM valid
+  )
+  UPDATE public.transactions t
+  SET transfer_pair_id = sides.pair_id
+  FROM sides
+  WHERE t.id = sides.id;
+
+  GET DIAGNOSTICS v_rows = ROW_COUNT;
+  RETURN v_rows / 2;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+REVOKE ALL ON FUNCTION public.link_transfer_pairs(UUID, JSONB) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.link_transfer_pairs(UUID, JSONB) TO service_role;
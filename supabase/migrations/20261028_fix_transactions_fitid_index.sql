@@ -0,0 +1,11 @@
+-- Migration: FITID uniqueness only for rows that still have an account
+-- transactions.account_id is ON DELETE SET NULL, so deleting an account moves its
+-- rows to account_id NULL; with NULLS NOT DISTINCT a FITID already present on
+-- another NULL-account row made the account impossible to delete. Rows without an
+-- account are deduplicated by the importers (existing_fitids) instead.
+
+DROP INDEX IF EXISTS public.idx_transactions_account_fitid;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_transactions_account_fitid
+    ON public.transactions(user_id, account_id, fitid)
+    WHERE fitid IS NOT NULL AND account_id IS NOT NULL;
@@ -0,0 +1,89 @@
+import { describe, it, expect } from 'vitest';
+import { addDays, fullMonthsRange, splitSummaryRange } from '../utils/helpers';
+
+describe('addDays', () => {
+  it('atravessa mês, ano e fevereiro bissexto', () => {
+    expect(addDays('2026-02-01', -1)).toBe('2026-01-31');
+    expect(addDays('2026-01-01', -1)).toBe('2025-12-31');
+    expect(addDays('2024-02-28', 1)).toBe('2024-02-29');
+    expect(addDays('2026-12-31', 1)).toBe('2027-01-01');
+  });
+});
+
+describe('fullMonthsRange', () => {
+  it('mês exato: do dia 1 ao último dia', () => {
+    expect(fullMonthsRange('2026-01-01', '2026-01-31')).toEqual({ fullStart: '2026-01-01', fullEnd: '2026-02-01' });
+    expect(fullMonthsRange('2024-02-01', '2024-02-29')).toEqual({ fullStart: '2024-02-01', fullEnd: '2024-03-01' });
+  });
+
+  it('meses parciais nas duas pontas', () => {
+    expect(fullMonthsRange('2026-01-05', '2026-03-10')).toEqual({ fullStart: '2026-02-01', fullEnd: '2026-03-01' });
+  });
+
+  it('início ou fim em aberto', () => {
+    expect(fullMonthsRange(undefined, '2026-03-10')).toEqual({ fullStart: undefined, fullEnd: '2026-03-01' });
+    expect(fullMonthsRange('2026-01-05', undefined)).toEqual({ fullStart: '2026-02-01', fullEnd: undefined });
+  });
+});
+
+describe('splitSummaryRange', () => {
+  it('mesmo mês parcial: tudo vem das transações', () => {
+    expect(splitSummaryRange('2026-01-05', '2026-01-20')).toEqual({
+      months: null,
+      edges: [['2026-01-05', '2026-01-20']],
+    });
+  });
+
+  it('mês exato: só monthly_aggregates', () => {
+    expect(splitSummaryRange('2026-01-01', '2026-01-31')).toEqual({
+      months: { fullStart: '2026-01-01', fullEnd: '2026-02-01' },
+      edges: [],
+    });
+  });
+
+  it('vários meses exatos, atravessando o ano', () => {
+    expect(splitSummaryRange('2025-11-01', '2026-02-28')).toEqual({
+      months: { fullStart: '2025-11-01', fullEnd: '2026-03-01' },
+      edges: [],
+    });
+  });
+
+  it('meses parciais nas duas pontas: pontas inclusivas sem sobreposição', () => {
+    expect(splitSummaryRange('2026-01-05', '2026-03-10')).toEqual({
+      months: { fullStart: '2026-02-01', fullEnd: '2026-03-01' },
+      edges: [['2026-01-05', '2026-01-31'], ['2026-03-01', '2026-03-10']],
+    });
+  });
+
+  it('dois meses parciais vizinhos, sem mês inteiro no meio', () => {
+    expect(splitSummaryRange('2026-01-05', '2026-02-10')).toEqual({
+      months: null,
+      edges: [['2026-01-05', '2026-02-10']],
+    });
+  });
+
+  it('início exato e fim parcial', () => {
+    expect(splitSummaryRange('2026-01-01', '2026-02-10')).toEqual({
+      months: { fullStart: '2026-01-01', fullEnd: '2026-02-01' },
+      edges: [['2026-02-01', '2026-02-10']],
+    });
+  });
+
+  it('início em aberto', () => {
+    expect(splitSummaryRange(undefined, '2026-03-10')).toEqual({
+      months: { fullStart: undefined, fullEnd: '2026-03-01' },
+      edges: [['2026-03-01', '2026-03-10']],
+    });
+  });
+
+  it('fim em aberto', () => {
+    expect(splitSummaryRange('2026-01-05', undefined)).toEqual({
+      months: { fullStart: '2026-02-01', fullEnd: undefined },
+      edges: [['2026-01-05', '2026-01-31']],
+    });
+  });
+
+  it('sem período: todos os meses agregados', () => {
+    expect(splitSummaryRange()).toEqual({ months: { fullStart: undefined, fullEnd: undefined }, edges: [] });
+  });
+});
@@ -31,6 +31,7 @@ export interface Transaction {
   installments?: number; // Total de parcelas
   installmentNumber?: number; // Número da parcela atual (Ex: 1 de 10)
   originalTransactionId?: string; // ID para agrupar parcelas
+  transferPairId?: string; // Transferência entre contas próprias (par entrada/saída)
 }
 
 export interface Card {
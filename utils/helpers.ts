@@ -401,3 +401,53 @@ export const logError = (
     console.error('[MonelyError] Failed to serialize error', e);
   }
 };
+
+/** 'YYYY-MM-DD' deslocada em `days` dias */
+export const addDays = (date: string, days: number): string => {
+  return new Date(Date.parse(date.slice(0, 10)) + days * 86400000).toISOString().slice(0, 10);
+};
+
+/**
+ * Meses inteiros contidos em [startDate, endDate] como [fullStart, fullEnd):
+ * fullStart é o 1º dia do 1º mês completo e fullEnd o 1º dia do mês seguinte ao último completo.
+ * Usado para ler meses inteiros de monthly_aggregates e só as pontas das transações.
+ */
+export const fullMonthsRange = (startDate?: string, endDate?: string): { fullStart?: string; fullEnd?: string } => {
+  const firstOfMonth = (date: string, offset: number) => {
+    const [y, m] = date.slice(0, 10).split('-').map(Number);
+    return new Date(Date.UTC(y, m - 1 + offset, 1)).toISOString().slice(0, 10);
+  };
+
+  let fullStart: string | undefined;
+  if (startDate) {
+    fullStart = startDate.slice(8, 10) === '01' ? startDate.slice(0, 10) : firstOfMonth(startDate, 1);
+  }
+
+  let fullEnd: string | undefined;
+  if (endDate) {
+    const nextMonth = firstOfMonth(endDate, 1);
+    fullEnd = addDays(nextMonth, -1) === endDate.slice(0, 10) ? nextMonth : firstOfMonth(endDate, 0);
+  }
+
+  return { fullStart, fullEnd };
+};
+
+/**
+ * Divide [startDate, endDate] entre meses inteiros (lidos de monthly_aggregates) e
+ * pontas inclusivas de meses parciais (somadas a partir das transações).
+ * `months` é null quando o período não contém nenhum mês inteiro; aí a única ponta é o período todo.
+ */
+export const splitSummaryRange = (
+  startDate?: string,
+  endDate?: string
+): { months: { fullStart?: string; fullEnd?: string } | null; edges: Array<[string | undefined, string | undefined]> } => {
+  const { fullStart, fullEnd } = fullMonthsRange(startDate, endDate);
+  if (fullStart && fullEnd && fullStart >= fullEnd) {
+    return { months: null, edges: [[startDate, endDate]] };
+  }
+
+  const edges: Array<[string | undefined, string | undefined]> = [];
+  if (startDate && fullStart && startDate < fullStart) edges.push([startDate, addDays(fullStart, -1)]);
+  if (endDate && fullEnd && fullEnd <= endDate) edges.push([fullEnd, endDate]);
+  return { months: { fullStart, fullEnd }, edges };
+};